@@ -0,0 +1,147 @@
+import copy
+from dataclasses import dataclass, field, fields
+from typing import Dict, List, Tuple
+
+from docling_core.types.doc import DoclingDocument, TableItem, TextItem
+from fuzzysearch import find_near_matches
+
+import config.constants as config
+from models.chapter import Chapter
+from txt_parsing.document_mapper import iterate_document_sections
+
+from .md_tables import Row
+from .model.advanced_properties import AdvancedProperties
+from .parser import fill_table
+from .row_mapper import RowStats
+
+
+@dataclass
+class DocTable:
+    """A (possibly page-merged) docling table with the text preceding it."""
+
+    title: str
+    header: List[Row]
+    rows: List[Row] = field(default_factory=list)
+    num_cols: int = 0
+    last_page: int = 0
+
+
+def split_header(item: TableItem) -> Tuple[List[Row], List[Row]]:
+    """
+    Split the cell grid into header rows and data rows. Cells spanning several rows
+    or columns are repeated in every grid position they cover. If docling marked no
+    column headers, the first row is the header, as in the markdown tables.
+    """
+    grid = [[cell.text.strip() for cell in row] for row in item.data.grid]
+    header_count = 0
+    for row in item.data.grid:
+        if not any(cell.column_header for cell in row):
+            break
+        header_count += 1
+    header_count = header_count or 1
+    return grid[:header_count], grid[header_count:]
+
+
+def table_pages(item: TableItem) -> Tuple[int, int]:
+    pages = [prov.page_no for prov in item.prov] or [0]
+    return min(pages), max(pages)
+
+
+def is_continuation(prev: DocTable, item: TableItem, title: str) -> bool:
+    """A table continues the previous one if it follows on the next page without any
+    text in between and has the same number of columns."""
+    first_page, _ = table_pages(item)
+    return (
+        not title
+        and prev.num_cols == item.data.num_cols
+        and 0 <= first_page - prev.last_page <= 1
+    )
+
+
+def is_table_child(item: TextItem, doc: DoclingDocument) -> bool:
+    """Captions and footnotes of a table are its children, they follow the table."""
+    return item.parent is not None and isinstance(item.parent.resolve(doc), TableItem)
+
+
+def collect_section_tables(
+    doc: DoclingDocument, base_chapters: List[Chapter]
+) -> Dict[Tuple[int, int], List[DocTable]]:
+    """Tables of every (chapter, subchapter), page-split tables are merged."""
+    chapters = copy.deepcopy(base_chapters)
+    res: Dict[Tuple[int, int], List[DocTable]] = {}
+    last_text: Dict[Tuple[int, int], str] = {}
+
+    for ch_num, sub_num, item in iterate_document_sections(doc, chapters):
+        key = (ch_num, sub_num)
+        if isinstance(item, TableItem):
+            text = last_text.pop(key, "")
+            title = item.caption_text(doc) or text
+            header, rows = split_header(item)
+            tables = res.setdefault(key, [])
+            if tables and is_continuation(tables[-1], item, title):
+                prev = tables[-1]
+                # Continuations either repeat the header or start with data rows
+                prev.rows.extend(rows if header == prev.header else header + rows)
+                prev.last_page = table_pages(item)[1]
+            else:
+                last_page = table_pages(item)[1]
+                tables.append(
+                    DocTable(title, header, rows, item.data.num_cols, last_page)
+                )
+        elif (
+            isinstance(item, TextItem)
+            and item.text.strip()
+            and not is_table_child(item, doc)
+        ):
+            last_text[key] = item.text.strip()
+
+    return res
+
+
+def find_named_table(
+    tables: List[DocTable], name: str, max_dev=config.MAX_DEVIATION
+) -> DocTable | None:
+    """The table whose title matches the name with the least errors."""
+    best, best_dist = None, max_dev + 1
+    for table in tables:
+        matches = find_near_matches(name, table.title, max_l_dist=max_dev)
+        if matches and matches[0].dist < best_dist:
+            best, best_dist = table, matches[0].dist
+    return best
+
+
+def header_names(header: List[Row]) -> Row:
+    """Column names of a (possibly multi-row) header, spanned cells are not repeated."""
+    if not header:
+        return []
+    return [
+        " ".join(dict.fromkeys(row[j] for row in header if row[j]))
+        for j in range(len(header[0]))
+    ]
+
+
+def parse_document_tables(
+    doc: DoclingDocument, base_chapters: List[Chapter], stats: RowStats | None = None
+) -> AdvancedProperties:
+    """
+    Structured counterpart of parse_tables. The entries are filled from docling's
+    table cell grids instead of re-parsing tables rendered as markdown.
+    """
+    res = AdvancedProperties()
+    stats = stats if stats is not None else RowStats()
+    section_tables = collect_section_tables(doc, base_chapters)
+
+    for f in fields(res):
+        table = getattr(res, f.name)
+        tables = section_tables.get((table.section, table.subsection), [])
+        if table.name == "":
+            found = tables[0] if tables else None
+        # Case when there is more tables in one section, they are told apart by titles
+        else:
+            found = find_named_table(tables, table.name)
+        if not found or not found.rows:
+            continue
+
+        fill_table(table, header_names(found.header), found.rows, stats)
+
+    return res
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import sqlite3
+from dataclasses import asdict, dataclass, fields, is_dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+import config.constants as config
+
+from .model.advanced_properties import AdvancedProperties
+from .row_mapper import RowStats
+
+
+@dataclass
+class TableMemo:
+    conn: sqlite3.Connection
+    hits: int = 0
+    misses: int = 0
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def open_table_memo(name: str = config.TABLE_MEMO_DB) -> TableMemo:
+    Path(name).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(name)
+    conn.cursor().execute(
+        "CREATE TABLE IF NOT EXISTS table_memo(key TEXT PRIMARY KEY, tables TEXT)"
+    )
+    conn.commit()
+    return TableMemo(conn)
+
+
+@lru_cache(maxsize=None)
+def schema_version(max_dev: int, column_match_min: float) -> str:
+    """
+    Version of the table model and of the parsing thresholds, it changes with any
+    table or entry field and with the thresholds. Changes of the parsing itself are
+    tracked by config.TABLE_PARSER_VERSION.
+    """
+    adv = AdvancedProperties()
+    schema = [config.TABLE_PARSER_VERSION, max_dev, column_match_min]
+    for f in fields(adv):
+        table = getattr(adv, f.name)
+        entry_fields = []
+        if is_dataclass(table.entry_type):
+            entry_fields = [ef.name for ef in fields(table.entry_type)]
+        schema.append(
+            [f.name, table.name, table.section, table.subsection, entry_fields]
+        )
+    return hashlib.sha256(json.dumps(schema).encode()).hexdigest()
+
+
+def normalize_content(content: str) -> str:
+    return "\n".join(line.strip() for line in content.splitlines() if line.strip())
+
+
+def section_key(content: str, section: int, subsection: int) -> str:
+    version = schema_version(config.MAX_DEVIATION, config.COLUMN_MATCH_MIN)
+    data = f"{version}\n{section}.{subsection}\n{normalize_content(content)}"
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def load_section(
+    memo: TableMemo, key: str, adv: AdvancedProperties, stats: RowStats
+) -> bool:
+    """Fill the tables of a section from the memo, returns False if it is not there."""
+    row = memo.conn.execute(
+        "SELECT tables FROM table_memo WHERE key = ?", (key,)
+    ).fetchone()
+    if row is None:
+        memo.misses += 1
+        return False
+
+    memo.hits += 1
+    data = json.loads(row[0])
+    for name, cached in data["tables"].items():
+        table = getattr(adv, name)
+        table.found = cached["found"]
+        table.entries = [table.entry_type(**entry) for entry in cached["entries"]]
+    stats.add(RowStats(**data["stats"]))
+    return True
+
+
+def store_section(
+    memo: TableMemo,
+    key: str,
+    adv: AdvancedProperties,
+    names: List[str],
+    stats: RowStats,
+):
+    tables = {
+        name: {
+            "found": getattr(adv, name).found,
+            "entries": [asdict(entry) for entry in getattr(adv, name).entries],
+        }
+        for name in names
+    }
+    memo.conn.execute(
+        "INSERT OR REPLACE INTO table_memo VALUES(?, ?)",
+        (key, json.dumps({"tables": tables, "stats": asdict(stats)})),
+    )
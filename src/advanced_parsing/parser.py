@@ -1,4 +1,5 @@
 import re
+from collections import defaultdict
 from dataclasses import fields
 from typing import List
 
@@ -7,8 +8,11 @@ from fuzzysearch import find_near_matches
 import config.constants as config
 from models.chapter import Chapter
 
-from .md_tables import filter_table_lines, parse_markdown_tables
+from .md_tables import Row, filter_table_lines, parse_markdown_tables
+from .memo import TableMemo, load_section, section_key, store_section
 from .model.advanced_properties import AdvancedProperties
+from .model.table import Table
+from .row_mapper import RowStats, compile_row_mapper, map_rows
 
 
 def get_chapter(chapters: List[Chapter], chapter_num: int, subchapter_num: int):
@@ -70,48 +74,86 @@ def match_sections_between_headers(
     return sections, matched_headers
 
 
-# Section is split into parts by the separator titles
-def get_splitted_section(
-    text: str, section: int, subsection: int, name: str, adv_prop: AdvancedProperties
-) -> str:
-    # Get all table names for the given section/subsection
-    section_names = [
+def get_section_table_names(
+    section: int, subsection: int, adv_prop: AdvancedProperties
+) -> List[str]:
+    """Get all table names for the given section/subsection."""
+    return [
         getattr(adv_prop, f.name).name
         for f in fields(adv_prop)
         if getattr(adv_prop, f.name).section == section
         and getattr(adv_prop, f.name).subsection == subsection
     ]
+
+
+# Section is split into parts by the separator titles
+def get_splitted_section(
+    text: str, section: int, subsection: int, name: str, adv_prop: AdvancedProperties
+) -> str:
+    section_names = get_section_table_names(section, subsection, adv_prop)
     sections, matched = match_sections_between_headers(text, section_names)
     return "" if name not in matched else sections[name]
 
 
-def parse_tables(chapters: List[Chapter]) -> AdvancedProperties:
+def parse_table(
+    table: Table, chapter: Chapter, adv_prop: AdvancedProperties, stats: RowStats
+):
+    if table.name == "":
+        content = chapter.content
+    # Case when there is more tables in one section, the section is split by separators
+    if table.name:
+        content = get_splitted_section(
+            chapter.content, table.section, table.subsection, table.name, adv_prop
+        )
+    tables = parse_markdown_tables(filter_table_lines(content))
+    if not tables or len(tables[0]) <= 1:
+        return
+
+    fill_table(table, tables[0][0], tables[0][1:], stats)
+
+
+def parse_tables(
+    chapters: List[Chapter],
+    stats: RowStats | None = None,
+    memo: TableMemo | None = None,
+) -> AdvancedProperties:
+    """
+    Parse all tables of the file section by section. With `memo`, non-empty sections
+    whose content was already parsed (in any file) are taken from the memo.
+    """
     res = AdvancedProperties()
-    table = None
-    chapter = ""
+    stats = stats if stats is not None else RowStats()
 
+    sections = defaultdict(list)
     for f in fields(res):
         table = getattr(res, f.name)
-        chapter = get_chapter(chapters, table.section, table.subsection)
-        if table.name == "":
-            content = chapter.content
-        # Case when there is more tables in one section, the section is split by separators
-        if table.name:
-            content = get_splitted_section(
-                chapter.content, table.section, table.subsection, table.name, res
-            )
-        tables = parse_markdown_tables(filter_table_lines(content))
-        if not tables or len(tables[0]) <= 1:
+        sections[(table.section, table.subsection)].append(f.name)
+
+    for (section, subsection), names in sections.items():
+        chapter = get_chapter(chapters, section, subsection)
+        # Missing or empty sections would all share one key, they are not memoized
+        memoized = memo is not None and chapter.content.strip() != ""
+        key = section_key(chapter.content, section, subsection) if memoized else ""
+        if memoized and load_section(memo, key, res, stats):
             continue
 
-        table.found = True
+        section_stats = RowStats()
+        for name in names:
+            parse_table(getattr(res, name), chapter, res, section_stats)
+        stats.add(section_stats)
 
-        constructor = table.entry_type
-        for row in tables[0][1:]:
-            try:
-                element = constructor(*row)
-                table.entries.append(element)
-            except Exception:
-                pass
+        if memoized:
+            store_section(memo, key, res, names, section_stats)
 
     return res
+
+
+def fill_table(table: Table, header: Row, rows: List[Row], stats: RowStats):
+    """
+    Mark the table as found and add an entry for every (non header) row. The columns
+    are mapped to the entry fields by the header, see compile_row_mapper.
+    """
+    table.found = True
+
+    mapper = compile_row_mapper(table.entry_type, tuple(header))
+    table.entries.extend(map_rows(mapper, rows, stats))
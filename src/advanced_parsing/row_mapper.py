@@ -0,0 +1,123 @@
+import re
+from dataclasses import MISSING, dataclass, fields, is_dataclass
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import List, Tuple
+
+import config.constants as config
+
+from .md_tables import Row
+
+
+@dataclass
+class RowStats:
+    mapped: int = 0
+    padded: int = 0  # mapped, but some required columns were missing
+    dropped: int = 0
+
+    def add(self, other: "RowStats"):
+        self.mapped += other.mapped
+        self.padded += other.padded
+        self.dropped += other.dropped
+
+
+@dataclass(frozen=True)
+class RowMapper:
+    entry_type: type
+    # (field name, column index or None, field has a default value)
+    columns: Tuple[Tuple[str, int | None, bool], ...]
+
+
+def normalize(name: str) -> str:
+    """camelCase and snake_case field names or table headers to lowercase words."""
+    name = re.sub(r"([a-z])([A-Z])", r"\1 \2", name).replace("_", " ")
+    return " ".join(re.findall(r"[a-z0-9]+", name.lower()))
+
+
+def similarity(name: str, column: str) -> float:
+    """
+    Similarity of a field name and a column name. Columns containing all words of the
+    field (e.g. "level" and "security level") score high, abbreviated words are
+    matched by their first four characters.
+    """
+    column_words = {word[:4] for word in column.split()}
+    words = [word[:4] for word in name.split()]
+    covered = sum(word in column_words for word in words) / len(words) if words else 0
+    return max(SequenceMatcher(None, name, column).ratio(), 0.9 * covered)
+
+
+@lru_cache(maxsize=None)
+def compile_row_mapper(entry_type: type, header: Tuple[str, ...]) -> RowMapper:
+    """
+    Build the mapping of table columns to the fields of the entry dataclass. Columns
+    are fuzzy matched to the fields by name, best pairs first, the remaining fields
+    are mapped by position. If less than half of the fields can be matched by name,
+    all columns are mapped by position. Compiled once per entry type and distinct
+    header.
+    """
+    if not is_dataclass(entry_type):
+        return RowMapper(entry_type, ())
+
+    entry_fields = fields(entry_type)
+    names = [normalize(f.name) for f in entry_fields]
+    columns = [normalize(column) for column in header]
+
+    pairs = sorted(
+        (
+            (similarity(name, column), i, j)
+            for i, name in enumerate(names)
+            for j, column in enumerate(columns)
+        ),
+        reverse=True,
+    )
+    assigned: dict = {}
+    used = set()
+    for score, i, j in pairs:
+        if score < config.COLUMN_MATCH_MIN:
+            break
+        if i in assigned or j in used:
+            continue
+        assigned[i] = j
+        used.add(j)
+
+    if len(assigned) < len(entry_fields) / 2:
+        assigned, used = {}, set()
+    # Fields without a matching name take the unused column at their position
+    for i in range(min(len(entry_fields), len(header))):
+        if i not in assigned and i not in used:
+            assigned[i] = i
+
+    return RowMapper(
+        entry_type,
+        tuple(
+            (
+                f.name,
+                assigned.get(i),
+                f.default is not MISSING or f.default_factory is not MISSING,
+            )
+            for i, f in enumerate(entry_fields)
+        ),
+    )
+
+
+def map_rows(mapper: RowMapper, rows: List[Row], stats: RowStats) -> list:
+    """Create entries from the rows, rows without any mapped value are dropped."""
+    entries = []
+    for row in rows:
+        values = {}
+        padded = False
+        for name, index, has_default in mapper.columns:
+            if index is not None and index < len(row):
+                values[name] = row[index]
+            elif not has_default:
+                values[name] = ""
+                padded = True
+
+        if not any(values.values()):
+            stats.dropped += 1
+            continue
+
+        entries.append(mapper.entry_type(**values))
+        stats.mapped += 1
+        stats.padded += padded
+    return entries
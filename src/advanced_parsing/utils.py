@@ -1,10 +1,13 @@
 import json
+import logging
 from dataclasses import asdict, fields, is_dataclass
 from pathlib import Path
 
 from .model.advanced_properties import AdvancedProperties
 from .model.table import Table
 
+logger = logging.getLogger(__name__)
+
 
 def table_asdict(table: Table):
     """Exports the Table to a dictionary with required keys."""
@@ -29,7 +32,7 @@ def export_adv_prop_to_json(
     data: AdvancedProperties, file: Path, output_dir: Path, indent: int = 4
 ):
     output_path = output_dir / f"{file.stem}.json"
-    print(f"Exporting file to {output_path}")
+    logger.info(f"Exporting file to {output_path}")
     if not is_dataclass(data):
         raise TypeError("Expected a dataclass instance (e.g., AdvancedProperties)")
     with output_path.open("w", encoding="utf-8") as f:
@@ -0,0 +1,140 @@
+import json
+import logging
+import sqlite3
+from collections import defaultdict
+from dataclasses import fields, is_dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype
+
+import config.constants as config
+from advanced_parsing.model.advanced_properties import AdvancedProperties
+from database.db_manager import select_file_metadata
+
+logger = logging.getLogger(__name__)
+
+METADATA_COLUMNS = ["cert_id", "year_from", "status"]
+
+
+def table_columns() -> Dict[str, List[str]]:
+    """Column names of every table in AdvancedProperties, keyed by table name."""
+    res = {}
+    adv = AdvancedProperties()
+    for f in fields(adv):
+        entry_type = getattr(adv, f.name).entry_type
+        # Entry types which are not dataclasses are not extracted yet
+        if is_dataclass(entry_type):
+            res[f.name] = [ef.name for ef in fields(entry_type)]
+    return res
+
+
+def load_file_metadata(db_name: str = config.DB_NAME) -> pd.DataFrame:
+    """Load cert_id, year_from and status of every file from the files table."""
+    conn = sqlite3.connect(db_name)
+    try:
+        rows = select_file_metadata(conn.cursor())
+    finally:
+        conn.close()
+    return pd.DataFrame(rows, columns=["filename"] + METADATA_COLUMNS).drop_duplicates(
+        "filename"
+    )
+
+
+def to_categorical(
+    df: pd.DataFrame, max_ratio: float = config.CATEGORICAL_MAX_RATIO
+) -> pd.DataFrame:
+    """Convert repetitive string columns to categorical dtype."""
+    for column in df.columns:
+        # Strings are object columns before pandas 3 and str columns since
+        is_string = is_object_dtype(df[column]) or is_string_dtype(df[column])
+        if not is_string or len(df) == 0:
+            continue
+        if df[column].nunique() / len(df) <= max_ratio:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def load_corpus(
+    input_dir: Path, db_name: str | None = config.DB_NAME
+) -> Dict[str, pd.DataFrame]:
+    """
+    Load all AdvancedProperties JSON exports from `input_dir` into one columnar
+    DataFrame per table. Every row is one table entry, extended by the filename and
+    (if `db_name` is given) the cert_id, year_from and status of the file.
+    """
+    files = sorted(input_dir.rglob("*.json"))
+    logger.info(f"Loading {len(files)} files into columnar tables")
+
+    columns = table_columns()
+    # Values are appended column-wise, rows are never materialized as objects
+    data = {name: defaultdict(list) for name in columns}
+
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            adv = json.load(f)
+        for name, table in adv.items():
+            if name not in columns or not table["entries"]:
+                continue
+            cols = data[name]
+            cols["filename"].extend([file.stem] * len(table["entries"]))
+            for column in columns[name]:
+                cols[column].extend(entry.get(column, "") for entry in table["entries"])
+
+    metadata = load_file_metadata(db_name) if db_name else None
+
+    res = {}
+    for name, cols in data.items():
+        df = pd.DataFrame(cols, columns=["filename"] + columns[name])
+        if metadata is not None:
+            df = df.merge(metadata, on="filename", how="left")
+        res[name] = to_categorical(df)
+    return res
+
+
+def filter_table(df: pd.DataFrame, **conditions) -> pd.DataFrame:
+    """
+    Filter rows by column values. A condition value can be a single value or a
+    list of accepted values, e.g. filter_table(df, status="active", year_from=[2023, 2024]).
+    """
+    mask = pd.Series(True, index=df.index)
+    for column, value in conditions.items():
+        if isinstance(value, (list, tuple, set)):
+            mask &= df[column].isin(value)
+        else:
+            mask &= df[column] == value
+    return df[mask]
+
+
+def group_count(df: pd.DataFrame, by: str | List[str]) -> pd.DataFrame:
+    """Number of entries and number of distinct files in each group."""
+    return (
+        df.groupby(by, observed=True)
+        .agg(entries=("filename", "size"), files=("filename", "nunique"))
+        .sort_values("entries", ascending=False)
+        .reset_index()
+    )
+
+
+def share_by(df: pd.DataFrame, by: str | List[str], column: str) -> pd.DataFrame:
+    """Share of each `column` value within each group, e.g. algorithm type per year."""
+    counts = df.groupby(by, observed=True)[column].value_counts()
+    shares = counts / counts.groupby(level=by, observed=True).transform("sum")
+    return pd.DataFrame({"count": counts, "share": shares}).reset_index()
+
+
+def export_to_parquet(tables: Dict[str, pd.DataFrame], output_dir: Path):
+    """Store every table as a separate parquet file named after the table."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    for name, df in tables.items():
+        output_path = output_dir / f"{name}.parquet"
+        df.to_parquet(output_path, index=False)
+        logger.info(f"Exported {len(df)} rows to {output_path}")
+
+
+def load_from_parquet(input_dir: Path) -> Dict[str, pd.DataFrame]:
+    """Load tables previously stored by export_to_parquet."""
+    return {
+        file.stem: pd.read_parquet(file) for file in sorted(input_dir.glob("*.parquet"))
+    }
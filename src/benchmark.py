@@ -0,0 +1,292 @@
+import argparse
+import json
+import logging
+import os
+import resource
+import shutil
+import time
+from dataclasses import asdict, dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import config.constants as config
+from analytics.corpus import export_to_parquet, load_corpus
+from database.db_manager import setup_db_files
+from main import extract_file_tables, map_file
+from models.chapter import Chapter
+from txt_parsing.chapter_utils import chapters_from_json
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StageResult:
+    stage: str
+    docs: int
+    workers: int
+    seconds: float
+    docs_per_second: float = 0.0
+    # Throughput per worker relative to the run with the fewest workers
+    efficiency: float = 1.0
+    peak_rss: int = 0  # bytes, largest process
+    total_rss: int = 0  # bytes, sum of the peaks of all worker processes
+    output_size: int = 0  # bytes written by the stage
+
+
+# Set once per worker process
+BASE_CHAPTERS: List[Chapter] = []
+OUTPUT_DIR = Path()
+
+
+def init_worker(base_chapters: List[Chapter], output_dir: Path):
+    global BASE_CHAPTERS, OUTPUT_DIR
+    BASE_CHAPTERS, OUTPUT_DIR = base_chapters, output_dir
+    # The exports log every file
+    for name in ["txt_parsing", "advanced_parsing", "analytics"]:
+        logging.getLogger(name).setLevel(logging.CRITICAL)
+
+
+def peak_rss() -> int:
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def map_task(file: Path) -> Tuple[tuple, int, int]:
+    """Mapping of map_chapters, without the sec-certs lookup."""
+    row = (file.stem, *map_file(file, BASE_CHAPTERS, OUTPUT_DIR))
+    return row, os.getpid(), peak_rss()
+
+
+def tables_task(file: Path) -> Tuple[None, int, int]:
+    """
+    Extraction of process_tables, without the table memo: the replicated files are
+    identical, so the memo would turn every replica into a hit.
+    """
+    extract_file_tables(file, OUTPUT_DIR, BASE_CHAPTERS)
+    return None, os.getpid(), peak_rss()
+
+
+def export_task(task: Tuple[List[tuple], Path]) -> Tuple[None, int, int]:
+    """Store the mapping results in the database and the tables in Parquet."""
+    rows, tables_dir = task
+    db_name = str(OUTPUT_DIR / "benchmark.db")
+    conn = setup_db_files(db_name)
+    conn.executemany(
+        "INSERT INTO files VALUES(?, ?, ?, ?, ?, NULL, NULL, NULL, NULL)", rows
+    )
+    conn.commit()
+    conn.close()
+    export_to_parquet(load_corpus(tables_dir, db_name), OUTPUT_DIR / "parquet")
+    return None, os.getpid(), peak_rss()
+
+
+def dir_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+def replicate_corpus(sources: List[Path], size: int, corpus_dir: Path) -> List[Path]:
+    """Corpus of `size` files, the source files are repeated as many times as needed."""
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    corpus_dir.mkdir(parents=True)
+    files = []
+    for i in range(size):
+        source = sources[i % len(sources)]
+        file = corpus_dir / f"{source.stem}.{i}.txt"
+        try:
+            os.link(source, file)
+        except OSError:
+            shutil.copyfile(source, file)
+        files.append(file)
+    return files
+
+
+def run_stage(
+    stage: str,
+    task: Callable,
+    items: list,
+    workers: int,
+    base_chapters: List[Chapter],
+    output_dir: Path,
+) -> Tuple[StageResult, list]:
+    """
+    Run the task on every item in a fresh pool, so that the peak RSS of the workers
+    belongs to this stage only. Returns the result and the values of the tasks.
+    """
+    shutil.rmtree(output_dir, ignore_errors=True)
+    output_dir.mkdir(parents=True)
+    values, rss = [], {}
+    chunk = max(1, len(items) // (workers * 4))
+
+    start = time.perf_counter()
+    initargs = (base_chapters, output_dir)
+    with Pool(workers, initializer=init_worker, initargs=initargs) as pool:
+        for value, pid, worker_rss in pool.imap_unordered(task, items, chunk):
+            values.append(value)
+            rss[pid] = max(rss.get(pid, 0), worker_rss)
+    seconds = time.perf_counter() - start
+
+    docs = len(items) if stage != "export" else len(items[0][0])
+    result = StageResult(
+        stage=stage,
+        docs=docs,
+        workers=workers,
+        seconds=round(seconds, 3),
+        docs_per_second=round(docs / seconds, 2) if seconds else 0.0,
+        peak_rss=max(rss.values(), default=0),
+        total_rss=sum(rss.values()),
+        output_size=dir_size(output_dir),
+    )
+    logger.info(f"{result}")
+    return result, values
+
+
+def run_benchmark(
+    input_dir: Path,
+    sizes: List[int],
+    workers: List[int],
+    work_dir: Path = Path(config.BENCHMARK_DIR),
+) -> List[StageResult]:
+    """
+    Run mapping, table extraction and export on corpora of the given sizes, built by
+    replicating the txt files of `input_dir`. Mapping and table extraction run with
+    every worker count, the export is single-process and runs once per size.
+    """
+    sources = sorted(input_dir.rglob("*.txt"))
+    if not sources:
+        raise FileNotFoundError(f"No txt files in {input_dir}")
+    base_chapters = chapters_from_json(Path(config.BASE_CHAPTERS))
+    chapters_dir, tables_dir = work_dir / "mapping", work_dir / "advanced"
+
+    results = []
+    try:
+        for size in sizes:
+            files = replicate_corpus(sources, size, work_dir / "corpus")
+            for count in workers:
+                result, rows = run_stage(
+                    "map", map_task, files, count, base_chapters, chapters_dir
+                )
+                results.append(result)
+                chapter_files = sorted(chapters_dir.glob("*.json"))
+                result, _ = run_stage(
+                    "tables",
+                    tables_task,
+                    chapter_files,
+                    count,
+                    base_chapters,
+                    tables_dir,
+                )
+                results.append(result)
+
+            result, _ = run_stage(
+                "export",
+                export_task,
+                [(rows, tables_dir)],
+                1,
+                base_chapters,
+                work_dir / "export",
+            )
+            results.append(result)
+    finally:
+        # The replicated corpus can have tens of thousands of files
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    add_efficiency(results)
+    return results
+
+
+def add_efficiency(results: List[StageResult]):
+    baseline: Dict[Tuple[str, int], StageResult] = {}
+    for r in results:
+        key = (r.stage, r.docs)
+        if key not in baseline or r.workers < baseline[key].workers:
+            baseline[key] = r
+    for r in results:
+        base = baseline[(r.stage, r.docs)]
+        if base.docs_per_second:
+            speedup = r.docs_per_second / base.docs_per_second
+            r.efficiency = round(speedup * base.workers / r.workers, 3)
+
+
+def growth(small: float, large: float) -> float:
+    return round(large / small, 3) if small else 0.0
+
+
+def scaling_summary(results: List[StageResult]) -> List[dict]:
+    """
+    Growth of the time and output size per document from the smallest to the largest
+    corpus, with the most workers. A growth above SUPERLINEAR_RATIO is flagged.
+    """
+    summary = []
+    for stage in dict.fromkeys(r.stage for r in results):
+        runs = [r for r in results if r.stage == stage and r.docs]
+        if not runs:
+            continue
+        workers = max(r.workers for r in runs)
+        runs = sorted((r for r in runs if r.workers == workers), key=lambda r: r.docs)
+        small, large = runs[0], runs[-1]
+        time_growth = growth(small.seconds / small.docs, large.seconds / large.docs)
+        size_growth = growth(
+            small.output_size / small.docs, large.output_size / large.docs
+        )
+        summary.append(
+            {
+                "stage": stage,
+                "workers": workers,
+                "docs": [small.docs, large.docs],
+                "time_per_doc_growth": time_growth,
+                "output_per_doc_growth": size_growth,
+                "superlinear": max(time_growth, size_growth) > config.SUPERLINEAR_RATIO,
+            }
+        )
+    return summary
+
+
+def export_results(results: List[StageResult], summary: List[dict], output_file: Path):
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w") as f:
+        json.dump(
+            {"runs": [asdict(r) for r in results], "summary": summary}, f, indent=4
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Throughput and memory of the pipeline by corpus size and workers"
+    )
+    parser.add_argument("--input", type=Path, default=Path(config.TXT_DIR))
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1000, 5000, 20000]
+    )
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1]
+    )
+    parser.add_argument("--output", type=Path, default=Path(config.SCALING_RESULTS))
+    args = parser.parse_args()
+
+    results = run_benchmark(args.input, args.sizes, sorted(set(args.workers)))
+    summary = scaling_summary(results)
+    export_results(results, summary, args.output)
+
+    print(
+        f"{'stage':>8}{'docs':>8}{'workers':>9}{'docs/s':>10}{'eff':>7}"
+        f"{'peak MB':>9}{'total MB':>10}{'out MB':>9}"
+    )
+    for r in results:
+        print(
+            f"{r.stage:>8}{r.docs:>8}{r.workers:>9}{r.docs_per_second:>10.1f}"
+            f"{r.efficiency:>7.2f}{r.peak_rss / 2**20:>9.0f}"
+            f"{r.total_rss / 2**20:>10.0f}{r.output_size / 2**20:>9.1f}"
+        )
+    for s in summary:
+        flag = "SUPERLINEAR" if s["superlinear"] else "ok"
+        print(
+            f"{s['stage']}: {s['docs'][0]} -> {s['docs'][1]} docs, time per doc "
+            f"x{s['time_per_doc_growth']}, output per doc "
+            f"x{s['output_per_doc_growth']} ({flag})"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,15 +1,68 @@
 # Directories
 PDF_DIR = "~/Downloads/fips/certs/targets/txt"
 TXT_DIR = "data/input/SP"
+DOCLING_JSON_DIR = "data/input/docling"
 CHAPTERS_JSON_DIR = "data/output/mapping"
 TABLES_JSON_DIR = "data/output/advanced"
+ANALYTICS_DIR = "data/output/analytics"
+SWEEP_RESULTS = "data/output/sweep.csv"
+SCALING_RESULTS = "data/output/scaling.json"
+BENCHMARK_DIR = "data/benchmark"
 
 # Parsing thresholds
 ERROR_ACCEPT = 5
 MAX_DEVIATION = 1
+# Table of contents detection
+TOC_MIN_LINES = 5
+TOC_MAX_GAP = 2
+# FIPS version is detected in this many characters from the start of the document
+FIPS_HEADER_CHARS = 5000
+
+# Bump when the table parsing changes, so that memoized tables are parsed again
+TABLE_PARSER_VERSION = 1
+# Minimal similarity of a table column name and an entry field name
+COLUMN_MATCH_MIN = 0.6
+
+# OCR decision: "auto", "always" or "never"
+OCR_MODE = "auto"
+# Pages with fewer non-whitespace characters in the text layer need OCR
+OCR_MIN_PAGE_CHARS = 100
+# Whole document is converted with OCR if the share of such pages is higher
+OCR_MAX_TEXTLESS_RATIO = 0.2
+
+# Cache of docling conversion results
+CACHE_DIR = "data/cache/docling"
+CACHE_MAX_SIZE = 10 * 2**30
+
+# Page-batched conversion
+PAGE_WINDOW = 8
+MAX_PAGE_WINDOW = 32
+MAX_RSS = 12 * 2**30
+# Share of MAX_RSS above which the window is halved and below which it grows
+RSS_HIGH_WATERMARK = 0.8
+RSS_LOW_WATERMARK = 0.5
+# Seconds between RSS samples while a window is converted
+RSS_SAMPLE_INTERVAL = 0.05
+
+# Conversion daemon
+DAEMON_HOST = "127.0.0.1"
+DAEMON_PORT = 8765
+# Jobs queued within DAEMON_BATCH_WAIT seconds of each other are converted together
+DAEMON_BATCH_SIZE = 8
+DAEMON_BATCH_WAIT = 0.5
+DAEMON_TIMEOUT = 3600
+
+# Scaling benchmark, growth of the time or output per document flagged as superlinear
+SUPERLINEAR_RATIO = 1.5
 
 # Config files
 BASE_CHAPTERS = "src/config/base_chapters.json"
 
 # Database
 DB_NAME = "data/output/db/more_errors.db"
+SEARCH_DB_NAME = "data/output/db/search.db"
+TABLE_MEMO_DB = "data/cache/table_memo.db"
+
+# Analytics
+# String columns with a lower unique/total ratio are stored as categoricals
+CATEGORICAL_MAX_RATIO = 0.5
@@ -3,40 +3,115 @@ import sqlite3
 from config.constants import DB_NAME
 
 
-def setup_db_files() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_NAME)
+def setup_db_files(name: str = DB_NAME) -> sqlite3.Connection:
+    conn = sqlite3.connect(name)
     conn.cursor().execute("DROP TABLE IF EXISTS files")
     conn.cursor().execute(
-        "CREATE TABLE files(filename, error, missing, status, cert_id, name, year_from)"
+        """CREATE TABLE files(
+            filename, error, missing, toc_lines, fips_version,
+            status, cert_id, name, year_from
+        )"""
     )
     conn.commit()
     return conn
 
 
-def setup_db_fips_versions(name: str) -> sqlite3.Connection:
+def setup_db_page_stats(name: str = DB_NAME) -> sqlite3.Connection:
     conn = sqlite3.connect(name)
-    conn.cursor().execute("DROP TABLE IF EXISTS fips_version")
-    conn.cursor().execute("CREATE TABLE IF NOT EXISTS fips_version(filename, version)")
+    conn.cursor().execute(
+        """CREATE TABLE IF NOT EXISTS page_stats(
+            filename, pages, full_pages, light_pages, skipped_pages, ocr_pages
+        )"""
+    )
+    conn.commit()
+    return conn
+
+
+def setup_db_ocr_decisions(name: str = DB_NAME) -> sqlite3.Connection:
+    conn = sqlite3.connect(name)
+    conn.cursor().execute(
+        """CREATE TABLE IF NOT EXISTS ocr_decisions(
+            filename, mode, ocr, pages, ocr_pages, seconds
+        )"""
+    )
+    # Tables created before the conversion time was stored
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(ocr_decisions)")]
+    if "seconds" not in columns:
+        conn.cursor().execute("ALTER TABLE ocr_decisions ADD COLUMN seconds")
+    conn.commit()
+    return conn
+
+
+def setup_db_memory_stats(name: str = DB_NAME) -> sqlite3.Connection:
+    conn = sqlite3.connect(name)
+    conn.cursor().execute(
+        """CREATE TABLE IF NOT EXISTS memory_stats(
+            filename, pages, windows, min_window, peak_rss
+        )"""
+    )
     conn.commit()
     return conn
 
 
 def insert_file_metadata(
-    file_name: str, error: int, missing: int, row, db_cur: sqlite3.Cursor
+    file_name: str,
+    error: int,
+    missing: int,
+    toc_lines: int,
+    fips_version: str,
+    row,
+    db_cur: sqlite3.Cursor,
 ):
+    """Files missing in the sec-certs library (`row` is None) have no metadata."""
+    metadata = [None] * 4
+    if row is not None:
+        metadata = [row["status"], row["cert_id"], row["name"], row["year_from"]]
     db_cur.execute(
-        """INSERT INTO files VALUES(?, ?, ?, ?, ?, ?, ?)""",
+        """INSERT INTO files VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (file_name, error, missing, toc_lines, fips_version, *metadata),
+    )
+
+
+def select_file_metadata(db_cur: sqlite3.Cursor) -> list:
+    db_cur.execute("""SELECT filename, cert_id, year_from, status FROM files""")
+    return db_cur.fetchall()
+
+
+def insert_page_stats(file_name: str, stats, db_cur: sqlite3.Cursor):
+    db_cur.execute("""DELETE FROM page_stats WHERE filename = ?""", (file_name,))
+    db_cur.execute(
+        """INSERT INTO page_stats VALUES(?, ?, ?, ?, ?, ?)""",
+        (
+            file_name,
+            stats.pages,
+            stats.full_pages,
+            stats.light_pages,
+            stats.skipped_pages,
+            stats.ocr_pages,
+        ),
+    )
+
+
+def insert_ocr_decision(
+    file_name: str, decision, seconds: float, db_cur: sqlite3.Cursor
+):
+    db_cur.execute("""DELETE FROM ocr_decisions WHERE filename = ?""", (file_name,))
+    db_cur.execute(
+        """INSERT INTO ocr_decisions VALUES(?, ?, ?, ?, ?, ?)""",
         (
             file_name,
-            error,
-            missing,
-            row["status"],
-            row["cert_id"],
-            row["name"],
-            row["year_from"],
+            decision.mode,
+            decision.ocr,
+            decision.pages,
+            len(decision.ocr_pages),
+            round(seconds, 3),
         ),
     )
 
 
-def insert_fips_version(file_name: str, version: str, db_cur: sqlite3.Cursor):
-    db_cur.execute("""INSERT INTO fips_version VALUES(?, ?)""", (file_name, version))
+def insert_memory_stats(file_name: str, stats, db_cur: sqlite3.Cursor):
+    db_cur.execute("""DELETE FROM memory_stats WHERE filename = ?""", (file_name,))
+    db_cur.execute(
+        """INSERT INTO memory_stats VALUES(?, ?, ?, ?, ?)""",
+        (file_name, stats.pages, stats.windows, stats.min_window, stats.peak_rss),
+    )
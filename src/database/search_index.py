@@ -0,0 +1,132 @@
+import argparse
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import List, Tuple
+
+import config.constants as config
+from txt_parsing.chapter_utils import chapters_from_json, traverse_chapters
+
+logger = logging.getLogger(__name__)
+
+# Bare terms with punctuation such as AES-GCM, SHA2-256 or 800-90A, FTS5 parses the
+# dash as a column filter or operator unless the term is a quoted phrase
+PUNCTUATED_TERM = re.compile(r'[^\s()"*:]*\w[-./]\w[^\s()"*:]*')
+
+
+def setup_search_index(name: str = config.SEARCH_DB_NAME) -> sqlite3.Connection:
+    Path(name).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(name)
+    conn.cursor().execute(
+        """CREATE VIRTUAL TABLE IF NOT EXISTS chapters USING fts5(
+            filename UNINDEXED, chapter UNINDEXED, title, content,
+            tokenize = 'porter unicode61'
+        )"""
+    )
+    conn.cursor().execute(
+        "CREATE TABLE IF NOT EXISTS indexed_files(filename PRIMARY KEY, mtime)"
+    )
+    conn.commit()
+    return conn
+
+
+def chapter_rows(file: Path) -> List[Tuple[str, str, str, str]]:
+    """Rows (filename, chapter number, title, content) of the chapters of a file."""
+    chapters = chapters_from_json(file)
+    rows = []
+    for title, (ch_num, sub_num) in traverse_chapters(chapters):
+        chapter = chapters[ch_num - 1]
+        if sub_num > 0:
+            chapter = chapter.subchapters[sub_num - 1]
+        if not chapter.content:
+            continue
+        number = f"{ch_num}.{sub_num}" if sub_num > 0 else str(ch_num)
+        rows.append((file.stem, number, title, chapter.content))
+    return rows
+
+
+def index_chapters(input_dir: Path, conn: sqlite3.Connection) -> int:
+    """
+    Index the chapters of every mapped JSON file in `input_dir`. Only files that are
+    new or were modified since the last run are (re)indexed, files which no longer
+    exist are removed from the index. Returns the number of (re)indexed files.
+    """
+    cur = conn.cursor()
+    indexed = dict(cur.execute("SELECT filename, mtime FROM indexed_files").fetchall())
+    files = {file.stem: file for file in input_dir.rglob("*.json")}
+
+    for stem in indexed.keys() - files.keys():
+        cur.execute("DELETE FROM chapters WHERE filename = ?", (stem,))
+        cur.execute("DELETE FROM indexed_files WHERE filename = ?", (stem,))
+
+    count = 0
+    for stem, file in files.items():
+        mtime = file.stat().st_mtime
+        if indexed.get(stem) == mtime:
+            continue
+        cur.execute("DELETE FROM chapters WHERE filename = ?", (stem,))
+        cur.executemany("INSERT INTO chapters VALUES(?, ?, ?, ?)", chapter_rows(file))
+        cur.execute("INSERT OR REPLACE INTO indexed_files VALUES(?, ?)", (stem, mtime))
+        count += 1
+
+    conn.commit()
+    logger.info(f"Indexed {count} files, {len(files) - count} were up to date")
+    return count
+
+
+def search(
+    conn: sqlite3.Connection, query: str, limit: int = 20, chapter: str | None = None
+) -> List[Tuple[str, str, str, str]]:
+    """
+    Run a full-text query (FTS5 syntax) and return (filename, chapter, title, snippet)
+    for the best ranked chapters. The results can be restricted to a chapter number.
+    """
+    sql = """SELECT filename, chapter, title,
+                snippet(chapters, 3, '[', ']', '...', 16)
+             FROM chapters WHERE chapters MATCH ?"""
+    params: list = [query]
+    if chapter:
+        sql += " AND chapter = ?"
+        params.append(chapter)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    return conn.cursor().execute(sql, params).fetchall()
+
+
+def quote_terms(query: str) -> str:
+    """Quote the punctuated terms of a query as phrases, quoted parts are kept."""
+    parts = query.split('"')
+    for i in range(0, len(parts), 2):
+        parts[i] = PUNCTUATED_TERM.sub(lambda m: f'"{m.group()}"', parts[i])
+    return '"'.join(parts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text search in mapped chapters")
+    parser.add_argument(
+        "query", nargs="?", help="FTS5 query, e.g. 'zeroization NEAR key'"
+    )
+    parser.add_argument("--index", action="store_true", help="update the index first")
+    parser.add_argument("--chapter", help="restrict results to a chapter, e.g. 10.1")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--db", default=config.SEARCH_DB_NAME)
+    args = parser.parse_args()
+
+    conn = setup_search_index(args.db)
+    if args.index:
+        index_chapters(Path(config.CHAPTERS_JSON_DIR), conn)
+    if args.query:
+        try:
+            results = search(conn, quote_terms(args.query), args.limit, args.chapter)
+        except sqlite3.OperationalError as e:
+            conn.close()
+            parser.error(f"invalid query {args.query!r}: {e}")
+        for filename, chapter, title, snippet in results:
+            print(f"{filename} {chapter} {title}\n    {' '.join(snippet.split())}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,33 +1,78 @@
+import argparse
 import logging
+import time
 from pathlib import Path
-from typing import List
-
-from sec_certs.dataset.fips import FIPSDataset
+from typing import List, Tuple
 
 import config.constants as config
+from advanced_parsing.document_tables import parse_document_tables
+from advanced_parsing.memo import TableMemo, open_table_memo
 from advanced_parsing.model.advanced_properties import AdvancedProperties
 from advanced_parsing.parser import parse_tables
+from advanced_parsing.row_mapper import RowStats
 from advanced_parsing.utils import export_adv_prop_to_json
 from database.db_manager import (
     insert_file_metadata,
-    insert_fips_version,
+    insert_memory_stats,
+    insert_ocr_decision,
+    insert_page_stats,
     setup_db_files,
+    setup_db_memory_stats,
+    setup_db_ocr_decisions,
+    setup_db_page_stats,
 )
 from models.chapter import Chapter
-# from pdf_parsing.parser import parse_pdf_to_text
+from sharding import (
+    Shard,
+    in_shard,
+    merge_databases,
+    merge_outputs,
+    shard_db_name,
+    shard_dir,
+)
 from txt_parsing.chapter_utils import chapters_from_json, chapters_to_json
+from txt_parsing.document_mapper import (
+    document_header_text,
+    extract_chapters_from_document,
+    load_document,
+)
 from txt_parsing.fips_detector import detect_fips_version
-from txt_parsing.mapper import extract_chapters_from_text
+from txt_parsing.mapper import detect_toc_spans, extract_chapters_from_text
 from txt_parsing.validator import validate_chapters
 
 logger = logging.getLogger(__name__)
 logging.getLogger("txt_parsing").setLevel(logging.CRITICAL)
 
 
-def process_pdfs_to_txt(input_dir: Path, output_dir: Path):
-    pdf_files = list(input_dir.rglob("*.pdf"))
+def process_pdfs_to_txt(
+    input_dir: Path,
+    output_dir: Path,
+    selective: bool = False,
+    batched: bool = False,
+    json_dir: Path = Path(config.DOCLING_JSON_DIR),
+    db_name: str = config.DB_NAME,
+    shard: Shard | None = None,
+):
+    """
+    Convert the PDFs to txt. With `selective` only the pages of the chapters with
+    extracted tables are fully converted, see parse_pdf_selectively. With `batched`
+    the PDFs are converted in memory bounded page windows, see parse_pdf_in_windows.
+    With `shard` only the PDFs assigned to the shard are converted.
+    """
+    # docling models are loaded only when PDFs are converted
+    from pdf_parsing.batched import parse_pdf_in_windows
+    from pdf_parsing.cache import cache_stats
+    from pdf_parsing.page_selection import parse_pdf_selectively
+    from pdf_parsing.parser import decide_ocr, parse_pdf_to_text, read_text_layer
+
+    pdf_files = [file for file in input_dir.rglob("*.pdf") if in_shard(file, shard)]
     logger.info(f"Found {len(pdf_files)} PDF files to process")
 
+    conn = setup_db_page_stats(db_name)
+    setup_db_ocr_decisions(db_name).close()
+    setup_db_memory_stats(db_name).close()
+    base_chapters = chapters_from_json(Path(config.BASE_CHAPTERS))
+
     for count, pdf_file in enumerate(pdf_files):
         output_file = output_dir / (pdf_file.stem + ".txt")
         if output_file.exists():
@@ -37,76 +82,226 @@ def process_pdfs_to_txt(input_dir: Path, output_dir: Path):
             continue
         logger.info(f"\nOn {count} / {len(pdf_files)}\nProcessing: {pdf_file}")
 
+        # OCR is used only where the PDF has no usable text layer
+        try:
+            page_texts = read_text_layer(pdf_file)
+        except Exception as e:
+            logger.error(f"Error reading the text layer of {pdf_file.name}: {e}")
+            continue
+        ocr_decision = decide_ocr(page_texts)
+
         # Parse the PDF
-        # parse_pdf_to_text(pdf_file, output_dir)
+        start = time.perf_counter()
+        if selective:
+            _, stats = parse_pdf_selectively(
+                pdf_file, base_chapters, output_dir, ocr_decision, page_texts
+            )
+            insert_page_stats(pdf_file.stem, stats, conn.cursor())
+        elif batched:
+            memory_stats = parse_pdf_in_windows(pdf_file, output_dir, ocr_decision.ocr)
+            if memory_stats:
+                insert_memory_stats(pdf_file.stem, memory_stats, conn.cursor())
+        else:
+            parse_pdf_to_text(pdf_file, output_dir, json_dir, ocr_decision.ocr)
+        # The conversion time allows comparing OCR_MODE settings on a sample
+        seconds = time.perf_counter() - start
+        insert_ocr_decision(pdf_file.stem, ocr_decision, seconds, conn.cursor())
+        conn.commit()
 
+    logger.info(f"Conversion cache: {cache_stats()}")
+    conn.close()
 
-def map_chapters(input_dir: Path, output_dir: Path, base_chapters_path: Path):
-    files = list(input_dir.rglob("*.txt"))
-    logger.info(f"Found {len(files)} txt files to process")
 
-    conn = setup_db_files()
+def map_file(
+    file: Path,
+    base_chapters: List[Chapter],
+    output_dir: Path,
+    from_documents: bool = False,
+) -> Tuple[int, int, int, str]:
+    """
+    Map one file to chapters and export them if accepted. Returns the number of
+    errors, missing subchapters and TOC lines and the FIPS version of the file.
+    """
+    if from_documents:
+        doc = load_document(file)
+        toc_spans = []
+        chapters: List[Chapter] = extract_chapters_from_document(doc, base_chapters)
+        fips_version = detect_fips_version(document_header_text(doc))
+    else:
+        with open(file) as f:
+            file_text = f.read()
+            toc_spans = detect_toc_spans(file_text.splitlines())
+            chapters = extract_chapters_from_text(file_text, base_chapters, toc_spans)
+        fips_version = detect_fips_version(file_text)
+
+    error, missing = validate_chapters(chapters, toc_spans)
+    toc_lines = sum(end - start for start, end in toc_spans)
+    if error < config.ERROR_ACCEPT:
+        chapters_to_json(chapters, file, output_dir)
+    return error, missing, toc_lines, fips_version
+
+
+def map_chapters(
+    input_dir: Path,
+    output_dir: Path,
+    base_chapters_path: Path,
+    from_documents: bool = False,
+    db_name: str = config.DB_NAME,
+    shard: Shard | None = None,
+):
+    """
+    Map the txt files in `input_dir` to chapters. With `from_documents` the input
+    are docling JSON documents and chapters are mapped from their section headers.
+    With `shard` only the files assigned to the shard are mapped.
+    """
+    # sec-certs is loaded only when chapters are mapped
+    from sec_certs.dataset.fips import FIPSDataset
+
+    pattern = "*.json" if from_documents else "*.txt"
+    files = [file for file in input_dir.rglob(pattern) if in_shard(file, shard)]
+    logger.info(f"Found {len(files)} files to process")
+
+    conn = setup_db_files(db_name)
 
     base_chapters = chapters_from_json(base_chapters_path)
 
+    # lookup files in the sec_certs library, loaded once for all files
+    dset = FIPSDataset.from_web()
+    sec_certs_df = dset.to_pandas()
+
     for count, file in enumerate(files):
         if count % 100 == 0:
             logger.info(f"On file {count} of {len(files)}")
-        with open(file) as f:
-            file_text = f.read()
-            chapters: List[Chapter] = extract_chapters_from_text(
-                file_text, base_chapters
-            )
-
-        error, missing = validate_chapters(chapters)
+        error, missing, toc_lines, fips_version = map_file(
+            file, base_chapters, output_dir, from_documents
+        )
 
-        # lookup file in the sec_certs library
-        dset = FIPSDataset.from_web()
-        sec_certs_df = dset.to_pandas()
         try:
             row = sec_certs_df.loc[file.stem]
-            insert_file_metadata(file.stem, error, missing, row, conn.cursor())
         except KeyError:
             logger.error(f"File {file.stem} not found in the library")
-        if error < config.ERROR_ACCEPT:
-            chapters_to_json(chapters, file, output_dir)
+            row = None
+        insert_file_metadata(
+            file.stem, error, missing, toc_lines, fips_version, row, conn.cursor()
+        )
 
     conn.commit()
     conn.close()
 
 
-def process_fips_versions(input_dir: Path):
-    files = list(input_dir.rglob("*.txt"))
-    conn = setup_db_files()
-    for count, file in enumerate(files):
-        with open(file) as f:
-            file_text = f.read()
+def extract_file_tables(
+    file: Path,
+    output_dir: Path,
+    base_chapters: List[Chapter],
+    from_documents: bool = False,
+    memo: TableMemo | None = None,
+) -> RowStats:
+    """Extract the tables of one file and export them, returns the row statistics."""
+    stats = RowStats()
+    if from_documents:
+        data: AdvancedProperties = parse_document_tables(
+            load_document(file), base_chapters, stats
+        )
+    else:
+        data = parse_tables(chapters_from_json(file), stats, memo)
+    export_adv_prop_to_json(data, file, output_dir)
+    return stats
 
-        fips_version = detect_fips_version(file_text)
-        insert_fips_version(file.stem, fips_version, conn.cursor())
-
-    conn.commit()
-    conn.close()
 
-
-def process_tables(input_dir: Path, output_dir: Path):
-    files = list(input_dir.rglob("*.json"))
+def process_tables(
+    input_dir: Path,
+    output_dir: Path,
+    from_documents: bool = False,
+    shard: Shard | None = None,
+):
+    """
+    Extract tables from the mapped chapter JSONs in `input_dir`. With `from_documents`
+    the input are docling JSON documents and tables are built from docling's tables.
+    With `shard` only the files assigned to the shard are processed.
+    """
+    files = [file for file in input_dir.rglob("*.json") if in_shard(file, shard)]
+    base_chapters = chapters_from_json(Path(config.BASE_CHAPTERS))
+    stats = RowStats()
+    # Identical chapters (e.g. in revisions of one module) are parsed only once
+    memo = open_table_memo(shard_db_name(config.TABLE_MEMO_DB, shard))
 
     for count, file in enumerate(files):
         logger.info(f"On file {count} of {len(files)}")
-        chapters = chapters_from_json(file)
-        data: AdvancedProperties = parse_tables(chapters)
-        export_adv_prop_to_json(data, file, output_dir)
+        file_stats = extract_file_tables(
+            file, output_dir, base_chapters, from_documents, memo
+        )
+        logger.info(f"Table rows of {file.stem}: {file_stats}")
+        stats.add(file_stats)
 
+    logger.info(f"Table rows in total: {stats}")
+    logger.info(
+        f"Table memo: {memo.hits} hits, {memo.misses} misses "
+        f"({memo.hit_rate():.1%} hit rate)"
+    )
+    memo.conn.commit()
+    memo.conn.close()
 
-def main():
-    # process_pdfs_to_txt(Path(config.PDF_DIR), Path(config.TXT_DIR))
+
+def merge_shards(num_shards: int):
+    """Combine the databases and output directories of all shards."""
+    shards = [(index, num_shards) for index in range(num_shards)]
+    merge_databases(
+        config.DB_NAME, [shard_db_name(config.DB_NAME, shard) for shard in shards]
+    )
+    for output_dir in [
+        config.TXT_DIR,
+        config.DOCLING_JSON_DIR,
+        config.CHAPTERS_JSON_DIR,
+        config.TABLES_JSON_DIR,
+    ]:
+        merge_outputs(output_dir, num_shards)
+
+
+def run_pipeline(shard: Shard | None = None):
+    """
+    Run the pipeline, with `shard` only on the files assigned to the shard. Each shard
+    writes into its own database and output directories, see merge_shards.
+    """
+    db_name = shard_db_name(config.DB_NAME, shard)
+    chapters_dir = shard_dir(config.CHAPTERS_JSON_DIR, shard)
+    tables_dir = shard_dir(config.TABLES_JSON_DIR, shard)
+    for directory in [chapters_dir, tables_dir]:
+        directory.mkdir(parents=True, exist_ok=True)
+
+    # process_pdfs_to_txt(
+    #     Path(config.PDF_DIR),
+    #     shard_dir(config.TXT_DIR, shard),
+    #     json_dir=shard_dir(config.DOCLING_JSON_DIR, shard),
+    #     db_name=db_name,
+    #     shard=shard,
+    # )
     map_chapters(
         Path(config.TXT_DIR),
-        Path(config.CHAPTERS_JSON_DIR),
+        chapters_dir,
         Path(config.BASE_CHAPTERS),
+        db_name=db_name,
+        shard=shard,
     )
-    process_tables(Path(config.CHAPTERS_JSON_DIR), Path(config.TABLES_JSON_DIR))
+    process_tables(chapters_dir, tables_dir, shard=shard)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SP conversion pipeline")
+    parser.add_argument("command", nargs="?", choices=["run", "merge"], default="run")
+    parser.add_argument("--num-shards", type=int, default=1)
+    parser.add_argument("--shard-index", type=int, default=0)
+    args = parser.parse_args()
+    if args.num_shards < 1:
+        parser.error("--num-shards must be at least 1")
+    if not 0 <= args.shard_index < args.num_shards:
+        parser.error(f"--shard-index must be between 0 and {args.num_shards - 1}")
+
+    if args.command == "merge":
+        merge_shards(args.num_shards)
+    elif args.num_shards > 1:
+        run_pipeline((args.shard_index, args.num_shards))
+    else:
+        run_pipeline()
 
 
 if __name__ == "__main__":
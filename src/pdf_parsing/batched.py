@@ -0,0 +1,133 @@
+import gc
+import logging
+import os
+import resource
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+import pypdfium2 as pdfium
+
+import config.constants as config
+
+from .parser import DOC_CONVERTER, NO_OCR_DOC_CONVERTER
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MemoryStats:
+    pages: int = 0
+    windows: int = 0
+    min_window: int = 0
+    peak_rss: int = 0  # bytes, highest RSS sampled while converting a window
+
+
+def current_rss() -> int:
+    """Resident set size of the process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # ru_maxrss is in kilobytes on Linux, it is the peak not the current RSS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def page_count(pdf_path: Path) -> int:
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+
+def convert_window(converter, pdf_path: Path, first: int, last: int) -> Tuple:
+    """
+    Convert the pages while sampling the RSS from another thread, returns the result
+    and the peak RSS of the conversion, measured while the pages are in memory.
+    """
+    peak = current_rss()
+    done = threading.Event()
+
+    def sample():
+        nonlocal peak
+        while not done.wait(config.RSS_SAMPLE_INTERVAL):
+            peak = max(peak, current_rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        result = converter.convert(pdf_path, page_range=(first, last))
+    finally:
+        done.set()
+        sampler.join()
+    return result, max(peak, current_rss())
+
+
+def next_window(window: int, rss: int, max_rss: int) -> int:
+    """Halve the window under memory pressure, grow it back when there is room."""
+    if rss > max_rss * config.RSS_HIGH_WATERMARK:
+        return max(1, window // 2)
+    if rss < max_rss * config.RSS_LOW_WATERMARK:
+        return min(config.MAX_PAGE_WINDOW, window * 2)
+    return window
+
+
+def parse_pdf_in_windows(
+    pdf_path: Path,
+    output_dir: str,
+    ocr: bool = True,
+    max_rss: int = config.MAX_RSS,
+    window: int = config.PAGE_WINDOW,
+) -> MemoryStats | None:
+    """
+    Convert the PDF in page windows and append the text of each window to the output
+    file, so only one window of pages is kept in memory. The window size adapts to
+    the peak RSS of each window to stay under `max_rss` bytes. The complete
+    document is never in memory, so it is neither cached nor saved as docling JSON.
+    """
+    converter = DOC_CONVERTER if ocr else NO_OCR_DOC_CONVERTER
+    try:
+        stats = MemoryStats(pages=page_count(pdf_path), min_window=window)
+    except Exception as e:
+        logger.error(f"Error reading PDF {pdf_path.name}: {e}")
+        return None
+
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    text_file = output_path / f"{pdf_path.stem}.txt"
+    # Written under a temporary name, an interrupted run does not look processed
+    tmp_file = text_file.with_suffix(".part")
+
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        first = 1
+        while first <= stats.pages:
+            last = min(first + window - 1, stats.pages)
+            try:
+                result, rss = convert_window(converter, pdf_path, first, last)
+            except Exception as e:
+                logger.error(f"Error parsing PDF pages {first}-{last}: {e}")
+                tmp_file.unlink()
+                return None
+            f.write(result.document.export_to_text() + "\n\n")
+            f.flush()
+
+            # Drop the pages of the window before the next one is converted
+            del result
+            gc.collect()
+
+            stats.peak_rss = max(stats.peak_rss, rss)
+            stats.windows += 1
+            if rss > max_rss:
+                logger.warning(
+                    f"RSS {rss / 2**20:.0f} MiB over the limit on pages {first}-{last}"
+                )
+            first = last + 1
+            window = next_window(window, rss, max_rss)
+            stats.min_window = min(stats.min_window, window)
+
+    tmp_file.replace(text_file)
+    print(f"Text saved to: {text_file}")
+    logger.info(f"{pdf_path.name}: {stats}")
+    return stats
@@ -0,0 +1,179 @@
+import argparse
+import gzip
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from importlib.metadata import version
+from pathlib import Path
+from typing import List
+
+from docling_core.types.doc import DoclingDocument
+from pydantic import BaseModel
+
+import config.constants as config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheStats:
+    entries: int = 0
+    size: int = 0
+    hits: int = 0
+    misses: int = 0
+
+
+# Hits and misses of the current run
+RUN_STATS = CacheStats()
+# Documents converted by other docling versions are not reused
+DOCLING_VERSIONS = ",".join(
+    f"{package}={version(package)}" for package in ["docling", "docling-core"]
+)
+
+
+def file_hash(pdf_path: Path) -> str:
+    sha = hashlib.sha256()
+    with open(pdf_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def profile_hash(pipeline_options: BaseModel) -> str:
+    """
+    Short hash of the converter profile, different options or docling versions never
+    share entries.
+    """
+    profile = f"{DOCLING_VERSIONS}\n{pipeline_options.model_dump_json()}"
+    return hashlib.sha256(profile.encode()).hexdigest()[:16]
+
+
+def cache_path(
+    pdf_path: Path, pipeline_options: BaseModel, cache_dir: str = config.CACHE_DIR
+) -> Path:
+    key = f"{file_hash(pdf_path)}-{profile_hash(pipeline_options)}"
+    return Path(cache_dir) / key[:2] / f"{key}.json.gz"
+
+
+def load_cached(path: Path) -> DoclingDocument | None:
+    """Load a cached document, the access time is kept in mtime for the eviction."""
+    if not path.exists():
+        RUN_STATS.misses += 1
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        doc = DoclingDocument.model_validate_json(f.read())
+    os.utime(path)
+    RUN_STATS.hits += 1
+    return doc
+
+
+def store_cached(path: Path, doc: DoclingDocument):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written under a temporary name, so that readers never see partial entries
+    tmp_path = path.with_suffix(".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        f.write(doc.model_dump_json())
+    tmp_path.replace(path)
+
+
+def cache_entries(cache_dir: str = config.CACHE_DIR) -> List[Path]:
+    return list(Path(cache_dir).glob("*/*.json.gz"))
+
+
+def cache_stats(cache_dir: str = config.CACHE_DIR) -> CacheStats:
+    entries = cache_entries(cache_dir)
+    return CacheStats(
+        entries=len(entries),
+        size=sum(entry.stat().st_size for entry in entries),
+        hits=RUN_STATS.hits,
+        misses=RUN_STATS.misses,
+    )
+
+
+def evict(
+    max_size: int = config.CACHE_MAX_SIZE, cache_dir: str = config.CACHE_DIR
+) -> int:
+    """Remove least recently used entries until the cache fits into `max_size` bytes."""
+    entries = sorted(
+        ((entry.stat(), entry) for entry in cache_entries(cache_dir)),
+        key=lambda x: x[0].st_mtime,
+    )
+    size = sum(stat.st_size for stat, _ in entries)
+    removed = 0
+    for stat, entry in entries:
+        if size <= max_size:
+            break
+        entry.unlink()
+        size -= stat.st_size
+        removed += 1
+    logger.info(f"Evicted {removed} entries, cache size is {size} bytes")
+    return removed
+
+
+def export_document(doc: DoclingDocument, output_file: Path, fmt: str):
+    """Export a document as "text", "markdown" or docling "json"."""
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "json":
+        doc.save_as_json(output_file)
+        return
+    text = doc.export_to_markdown() if fmt == "markdown" else doc.export_to_text()
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def export_from_cache(
+    input_dir: Path,
+    output_dir: Path,
+    pipeline_options: BaseModel,
+    fmt: str,
+    cache_dir: str = config.CACHE_DIR,
+) -> int:
+    """Regenerate an export of every PDF in `input_dir` from cached documents only."""
+    suffix = {"text": ".txt", "markdown": ".md", "json": ".json"}[fmt]
+    count = 0
+    for pdf_file in input_dir.rglob("*.pdf"):
+        doc = load_cached(cache_path(pdf_file, pipeline_options, cache_dir))
+        if doc is None:
+            logger.warning(f"{pdf_file.name} is not in the cache")
+            continue
+        export_document(doc, output_dir / f"{pdf_file.stem}{suffix}", fmt)
+        count += 1
+    return count
+
+
+def main():
+    # Converter profiles are defined together with the converters
+    from pdf_parsing.parser import no_ocr_pipeline_options, pipeline_options
+
+    parser = argparse.ArgumentParser(description="Cache of docling conversion results")
+    parser.add_argument("--cache-dir", default=config.CACHE_DIR)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="show number of entries and size")
+    evict_parser = subparsers.add_parser("evict", help="evict least recently used")
+    evict_parser.add_argument("--max-size", type=int, default=config.CACHE_MAX_SIZE)
+    export_parser = subparsers.add_parser("export", help="export cached documents")
+    export_parser.add_argument("input_dir", type=Path)
+    export_parser.add_argument("output_dir", type=Path)
+    export_parser.add_argument(
+        "--format", choices=["text", "markdown", "json"], default="text"
+    )
+    export_parser.add_argument("--no-ocr", action="store_true", help="no-OCR profile")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        stats = cache_stats(args.cache_dir)
+        print(f"Entries: {stats.entries}\nSize: {stats.size / 2**20:.1f} MiB")
+    elif args.command == "evict":
+        evict(args.max_size, args.cache_dir)
+    elif args.command == "export":
+        options = no_ocr_pipeline_options if args.no_ocr else pipeline_options
+        count = export_from_cache(
+            args.input_dir, args.output_dir, options, args.format, args.cache_dir
+        )
+        print(f"Exported {count} documents")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,207 @@
+import argparse
+import json
+import logging
+import queue
+import threading
+import urllib.request
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List
+
+from docling.datamodel.base_models import ConversionStatus, InputFormat
+from docling_core.types.doc import DoclingDocument
+
+import config.constants as config
+
+from .cache import cache_path, evict, load_cached, store_cached
+from .parser import (
+    DOC_CONVERTER,
+    NO_OCR_DOC_CONVERTER,
+    decide_ocr,
+    no_ocr_pipeline_options,
+    pipeline_options,
+    read_text_layer,
+)
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"text", "markdown", "json"}
+
+
+@dataclass
+class Job:
+    pdf_path: Path
+    fmt: str
+    ocr: bool | None = None  # decided from the text layer if not given
+    done: threading.Event = field(default_factory=threading.Event)
+    output: str | None = None
+    error: str | None = None
+
+
+JOBS: "queue.Queue[Job]" = queue.Queue()
+
+
+def export(doc: DoclingDocument, fmt: str) -> str:
+    """Same formats as cache.export_document, returned instead of written."""
+    if fmt == "json":
+        return json.dumps(doc.export_to_dict())
+    return doc.export_to_markdown() if fmt == "markdown" else doc.export_to_text()
+
+
+def next_batch() -> List[Job]:
+    """Wait for a job, then take the jobs queued in the meantime, up to a full batch."""
+    batch = [JOBS.get()]
+    while len(batch) < config.DAEMON_BATCH_SIZE:
+        try:
+            batch.append(JOBS.get(timeout=config.DAEMON_BATCH_WAIT))
+        except queue.Empty:
+            break
+    return batch
+
+
+def convert_batch(batch: List[Job]):
+    """
+    Convert the jobs not found in the cache, one convert_all call per converter. The
+    text layer for the OCR decision is read here, pdfium must not be used from the
+    request threads while the worker converts.
+    """
+    pending = []
+    for job in batch:
+        if job.ocr is None:
+            try:
+                job.ocr = decide_ocr(read_text_layer(job.pdf_path)).ocr
+            except Exception as e:
+                job.error = f"Cannot read the text layer: {e}"
+                continue
+        options = pipeline_options if job.ocr else no_ocr_pipeline_options
+        doc = load_cached(cache_path(job.pdf_path, options))
+        if doc is None:
+            pending.append(job)
+        else:
+            job.output = export(doc, job.fmt)
+
+    for ocr, converter in [(True, DOC_CONVERTER), (False, NO_OCR_DOC_CONVERTER)]:
+        jobs = [job for job in pending if job.ocr == ocr]
+        if not jobs:
+            continue
+        options = pipeline_options if ocr else no_ocr_pipeline_options
+        results = converter.convert_all(
+            [job.pdf_path for job in jobs], raises_on_error=False
+        )
+        for job, result in zip(jobs, results):
+            if result.status != ConversionStatus.SUCCESS:
+                job.error = f"Conversion failed: {result.status}"
+                continue
+            store_cached(cache_path(job.pdf_path, options), result.document)
+            job.output = export(result.document, job.fmt)
+
+    if pending:
+        evict()
+
+
+def worker():
+    while True:
+        batch = next_batch()
+        logger.info(f"Converting a batch of {len(batch)} documents")
+        try:
+            convert_batch(batch)
+        except Exception as e:
+            logger.error(f"Error converting batch: {e}")
+            for job in batch:
+                job.error = job.error or str(e)
+        for job in batch:
+            job.done.set()
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """POST /convert with {"path": ..., "format": "text" | "markdown" | "json"}."""
+
+    def send(self, code: int, body: str, content_type: str = "text/plain"):
+        data = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send(404, "Not found")
+            return
+        self.send(200, json.dumps({"queued": JOBS.qsize()}), "application/json")
+
+    def do_POST(self):
+        if self.path != "/convert":
+            self.send(404, "Not found")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            pdf_path = Path(request["path"])
+            fmt = request.get("format", "text")
+        except (ValueError, KeyError, TypeError) as e:
+            self.send(400, f"Invalid request: {e}")
+            return
+        if fmt not in FORMATS or not pdf_path.is_file():
+            self.send(400, f"Unknown format {fmt} or missing file {pdf_path}")
+            return
+
+        ocr = request.get("ocr")
+        if ocr is not None and not isinstance(ocr, bool):
+            self.send(400, f"ocr must be true, false or null, not {ocr!r}")
+            return
+
+        job = Job(pdf_path, fmt, ocr)
+        JOBS.put(job)
+        if not job.done.wait(config.DAEMON_TIMEOUT):
+            self.send(504, "Conversion timed out")
+        elif job.error:
+            self.send(500, job.error)
+        else:
+            content_type = "application/json" if fmt == "json" else "text/plain"
+            self.send(200, job.output, content_type)
+
+
+def serve(host: str = config.DAEMON_HOST, port: int = config.DAEMON_PORT):
+    """Load the docling models once and serve conversion requests until stopped."""
+    for converter in [DOC_CONVERTER, NO_OCR_DOC_CONVERTER]:
+        converter.initialize_pipeline(InputFormat.PDF)
+    threading.Thread(target=worker, daemon=True).start()
+
+    server = ThreadingHTTPServer((host, port), ConversionHandler)
+    logger.info(f"Conversion daemon listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def convert_remote(
+    pdf_path: Path,
+    fmt: str = "text",
+    host: str = config.DAEMON_HOST,
+    port: int = config.DAEMON_PORT,
+) -> str:
+    """Client for the daemon, returns the converted document in the given format."""
+    body = {"path": str(Path(pdf_path).resolve()), "format": fmt}
+    request = urllib.request.Request(
+        f"http://{host}:{port}/convert",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=config.DAEMON_TIMEOUT) as response:
+        return response.read().decode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local docling conversion daemon")
+    parser.add_argument("--host", default=config.DAEMON_HOST)
+    parser.add_argument("--port", type=int, default=config.DAEMON_PORT)
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,178 @@
+import logging
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+
+from advanced_parsing.model.advanced_properties import AdvancedProperties
+from models.chapter import Chapter
+from txt_parsing.mapper import (
+    compile_chapter_patterns,
+    detect_toc_spans,
+    match_chapter_heading,
+)
+
+from .parser import (
+    DOC_CONVERTER,
+    LIGHT_DOC_CONVERTER,
+    NO_OCR_DOC_CONVERTER,
+    OcrDecision,
+    decide_ocr,
+    read_text_layer,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageStats:
+    pages: int = 0
+    full_pages: int = 0  # table structure recognition, OCR only on the ocr_pages
+    light_pages: int = 0  # text layer only
+    skipped_pages: int = 0
+    ocr_pages: int = 0
+
+
+def locate_chapter_pages(
+    page_texts: List[str], base_chapters: List[Chapter]
+) -> Dict[Tuple[int, int], int]:
+    """
+    Find the page (numbered from 1) on which each chapter and subchapter heading is,
+    using the same heading matching as the mapper. The table of contents is skipped.
+    """
+    lines, line_pages = [], []
+    for page_no, text in enumerate(page_texts, 1):
+        for line in text.splitlines():
+            lines.append(line)
+            line_pages.append(page_no)
+    toc_lines = {i for start, end in detect_toc_spans(lines) for i in range(start, end)}
+
+    patterns = compile_chapter_patterns(base_chapters)
+    starts = {}
+    curr_chapter = 0
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped == "" or i in toc_lines:
+            continue
+        if not (stripped.startswith("##") or stripped[0].isnumeric()):
+            continue
+        heading = match_chapter_heading(patterns, stripped, curr_chapter)
+        if heading and heading not in starts:
+            curr_chapter = heading[0]
+            starts[heading] = line_pages[i]
+    return starts
+
+
+def table_sections() -> Set[Tuple[int, int]]:
+    """(chapter, subchapter) numbers of all sections with tables to be extracted."""
+    adv = AdvancedProperties()
+    return {
+        (getattr(adv, f.name).section, getattr(adv, f.name).subsection)
+        for f in fields(adv)
+    }
+
+
+def select_pages(
+    starts: Dict[Tuple[int, int], int], num_pages: int
+) -> List[str | None]:
+    """
+    Decide for every page how it is converted: "full" for pages of sections with
+    tables (table structure recognition), "light" for the rest of the chapters and
+    None for pages before the first chapter (title page, revision history, table of
+    contents).
+    """
+    if not starts:
+        return ["full"] * num_pages
+
+    first_page = min(starts.values())
+    modes: List[str | None] = [
+        None if page < first_page else "light" for page in range(1, num_pages + 1)
+    ]
+
+    ordered = sorted(starts.items(), key=lambda x: (x[1], x[0]))
+    sections = table_sections()
+    for i, (heading, start) in enumerate(ordered):
+        if heading not in sections:
+            continue
+        # The section ends on the page where the next heading starts
+        end = ordered[i + 1][1] if i + 1 < len(ordered) else num_pages
+        for page in range(start, end + 1):
+            modes[page - 1] = "full"
+    return modes
+
+
+def page_runs(modes: List[str | None]) -> List[Tuple[str, int, int]]:
+    """Group consecutive pages with the same mode into (mode, first, last) runs."""
+    runs = []
+    for page, mode in enumerate(modes, 1):
+        if mode is None:
+            continue
+        if runs and runs[-1][0] == mode and runs[-1][2] == page - 1:
+            runs[-1] = (mode, runs[-1][1], page)
+        else:
+            runs.append((mode, page, page))
+    return runs
+
+
+def parse_pdf_selectively(
+    pdf_path: Path,
+    base_chapters: List[Chapter],
+    output_dir: str | None = None,
+    ocr_decision: OcrDecision | None = None,
+    page_texts: List[str] | None = None,
+) -> Tuple[str | None, PageStats]:
+    """
+    Two-phase conversion: chapter boundaries are located in the PDF text layer, then
+    only the pages of sections with extracted tables go through table structure
+    recognition. The other chapter pages are converted from the text layer only and
+    pages before the first chapter are skipped. OCR is used only on the converted
+    pages listed in the OCR decision. PDFs without a usable text layer are fully
+    converted with OCR. The text layer is read from the PDF unless already given in
+    `page_texts`.
+    """
+    if page_texts is None:
+        page_texts = read_text_layer(pdf_path)
+    if ocr_decision is None:
+        ocr_decision = decide_ocr(page_texts)
+    starts = locate_chapter_pages(page_texts, base_chapters)
+    modes = select_pages(starts, len(page_texts))
+
+    # Pages without text layer need OCR even in an otherwise born-digital PDF
+    for page in ocr_decision.ocr_pages:
+        if modes[page - 1] is not None:
+            modes[page - 1] = "ocr"
+
+    stats = PageStats(
+        pages=len(modes),
+        full_pages=modes.count("full") + modes.count("ocr"),
+        light_pages=modes.count("light"),
+        skipped_pages=modes.count(None),
+        ocr_pages=modes.count("ocr"),
+    )
+    logger.info(f"{pdf_path.name}: {stats}")
+
+    converters = {
+        "ocr": DOC_CONVERTER,
+        "full": NO_OCR_DOC_CONVERTER,
+        "light": LIGHT_DOC_CONVERTER,
+    }
+    parts = []
+    for mode, first, last in page_runs(modes):
+        try:
+            result = converters[mode].convert(pdf_path, page_range=(first, last))
+        except Exception as e:
+            logger.error(f"Error parsing PDF pages {first}-{last}: {e}")
+            return None, stats
+        parts.append(result.document.export_to_text())
+    text = "\n\n".join(parts)
+
+    if output_dir:
+        output_path = Path(output_dir)
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        text_file = output_path / f"{pdf_path.stem}.txt"
+        with open(text_file, "w", encoding="utf-8") as f:
+            f.write(text)
+
+        print(f"Text saved to: {text_file}")
+
+    return text, stats
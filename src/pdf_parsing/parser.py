@@ -1,10 +1,17 @@
 import logging
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import List
 
+import pypdfium2 as pdfium
 from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions, TableFormerMode
 from docling.document_converter import DocumentConverter, PdfFormatOption
 
+import config.constants as config
+
+from .cache import cache_path, evict, load_cached, store_cached
+
 logger = logging.getLogger(__name__)
 
 
@@ -17,13 +24,97 @@ DOC_CONVERTER = DocumentConverter(
     format_options={InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)}
 )
 
+# Born-digital PDFs, the text is taken from the text layer
+no_ocr_pipeline_options = pipeline_options.model_copy(deep=True)
+no_ocr_pipeline_options.do_ocr = False
+
+NO_OCR_DOC_CONVERTER = DocumentConverter(
+    format_options={
+        InputFormat.PDF: PdfFormatOption(pipeline_options=no_ocr_pipeline_options)
+    }
+)
+
+# Text layer only, used for pages without any extracted tables
+light_pipeline_options = PdfPipelineOptions()
+light_pipeline_options.do_ocr = False
+light_pipeline_options.do_table_structure = False
+
+LIGHT_DOC_CONVERTER = DocumentConverter(
+    format_options={
+        InputFormat.PDF: PdfFormatOption(pipeline_options=light_pipeline_options)
+    }
+)
+
+
+@dataclass
+class OcrDecision:
+    ocr: bool
+    mode: str
+    pages: int = 0
+    # Pages (numbered from 1) which are converted with OCR
+    ocr_pages: List[int] = field(default_factory=list)
+
 
-def parse_pdf_to_text(pdf_path: Path, output_dir: str | None = None):
+def read_text_layer(pdf_path: Path) -> List[str]:
+    """Text of every page from the PDF text layer, no layout analysis or OCR."""
+    pdf = pdfium.PdfDocument(str(pdf_path))
+    texts = []
     try:
-        result = DOC_CONVERTER.convert(pdf_path)
-    except Exception as e:
-        logger.error(f"Error parsing PDF: {e}")
-        return None
+        for page in pdf:
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+    finally:
+        pdf.close()
+    return texts
+
+
+def decide_ocr(page_texts: List[str], mode: str = config.OCR_MODE) -> OcrDecision:
+    """
+    Decide whether the document needs OCR. In the "auto" mode a page needs OCR if its
+    text layer has less than config.OCR_MIN_PAGE_CHARS characters and the whole
+    document is converted with OCR if the share of such pages exceeds
+    config.OCR_MAX_TEXTLESS_RATIO. The "always" and "never" modes are kept for
+    comparison with the automatic decision.
+    """
+    pages = len(page_texts)
+    if mode == "always":
+        return OcrDecision(True, mode, pages, list(range(1, pages + 1)))
+    if mode == "never":
+        return OcrDecision(False, mode, pages)
+
+    textless = [
+        page_no
+        for page_no, text in enumerate(page_texts, 1)
+        if len("".join(text.split())) < config.OCR_MIN_PAGE_CHARS
+    ]
+    ocr = pages == 0 or len(textless) / pages > config.OCR_MAX_TEXTLESS_RATIO
+    return OcrDecision(ocr, mode, pages, textless)
+
+
+def parse_pdf_to_text(
+    pdf_path: Path,
+    output_dir: str | None = None,
+    json_dir: str | None = None,
+    ocr: bool = True,
+    use_cache: bool = True,
+):
+    converter = DOC_CONVERTER if ocr else NO_OCR_DOC_CONVERTER
+    options = pipeline_options if ocr else no_ocr_pipeline_options
+
+    # Conversion results are cached by PDF content and converter profile
+    cached_file = cache_path(pdf_path, options) if use_cache else None
+    document = load_cached(cached_file) if cached_file else None
+    if document is None:
+        try:
+            document = converter.convert(pdf_path).document
+        except Exception as e:
+            logger.error(f"Error parsing PDF: {e}")
+            return None
+        if cached_file:
+            store_cached(cached_file, document)
+            evict()
 
     if output_dir:
         output_path = Path(output_dir)
@@ -31,8 +122,18 @@ def parse_pdf_to_text(pdf_path: Path, output_dir: str | None = None):
 
         text_file = output_path / f"{pdf_path.stem}.txt"
         with open(text_file, "w", encoding="utf-8") as f:
-            f.write(result.document.export_to_text())
+            f.write(document.export_to_text())
 
         print(f"Text saved to: {text_file}")
 
-    return result.document
+    # The structured document is kept for the section header based mapping
+    if json_dir:
+        json_path = Path(json_dir)
+        json_path.mkdir(parents=True, exist_ok=True)
+
+        json_file = json_path / f"{pdf_path.stem}.json"
+        document.save_as_json(json_file)
+
+        print(f"Document saved to: {json_file}")
+
+    return document
@@ -0,0 +1,71 @@
+import hashlib
+import logging
+import shutil
+import sqlite3
+from pathlib import Path
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (shard index, number of shards)
+Shard = Tuple[int, int]
+
+
+def shard_of(stem: str, num_shards: int) -> int:
+    """Deterministic shard of a file, the same on every machine and Python run."""
+    digest = hashlib.sha1(stem.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % num_shards
+
+
+def in_shard(file: Path, shard: Shard | None) -> bool:
+    return shard is None or shard_of(file.stem, shard[1]) == shard[0]
+
+
+def shard_dir(path: str | Path, shard: Shard | None) -> Path:
+    """Output directory of the shard, a subdirectory of the unsharded one."""
+    return Path(path) if shard is None else Path(path) / f"shard-{shard[0]}"
+
+
+def shard_db_name(db_name: str, shard: Shard | None) -> str:
+    if shard is None:
+        return db_name
+    path = Path(db_name)
+    return str(path.with_name(f"{path.stem}.shard-{shard[0]}{path.suffix}"))
+
+
+def merge_databases(db_name: str, shard_db_names: List[str]):
+    """
+    Combine the tables of all shard databases into `db_name`. Tables present in the
+    shards are recreated in the target, other tables of the target are kept.
+    """
+    conn = sqlite3.connect(db_name)
+    created = set()
+    for shard_db in shard_db_names:
+        if not Path(shard_db).exists():
+            logger.warning(f"Shard database {shard_db} does not exist")
+            continue
+        conn.execute("ATTACH DATABASE ? AS shard", (shard_db,))
+        tables = conn.execute(
+            "SELECT name, sql FROM shard.sqlite_master WHERE type = 'table'"
+        ).fetchall()
+        for name, sql in tables:
+            if name not in created:
+                conn.execute(f'DROP TABLE IF EXISTS main."{name}"')
+                conn.execute(sql)
+                created.add(name)
+            conn.execute(f'INSERT INTO main."{name}" SELECT * FROM shard."{name}"')
+        conn.commit()
+        conn.execute("DETACH DATABASE shard")
+    conn.close()
+    logger.info(f"Merged {len(shard_db_names)} shard databases into {db_name}")
+
+
+def merge_outputs(output_dir: str | Path, num_shards: int):
+    """Move the files of every shard directory into the unsharded output directory."""
+    for index in range(num_shards):
+        directory = shard_dir(output_dir, (index, num_shards))
+        if not directory.exists():
+            continue
+        for file in directory.iterdir():
+            shutil.move(str(file), str(Path(output_dir) / file.name))
+        directory.rmdir()
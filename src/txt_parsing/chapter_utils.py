@@ -1,9 +1,12 @@
 from dataclasses import asdict
 import json
+import logging
 from pathlib import Path
 from typing import Iterator, List, Tuple
 from models.chapter import Chapter
 
+logger = logging.getLogger(__name__)
+
 
 def traverse_chapters(chapters: List[Chapter]) -> Iterator[tuple[str, Tuple[int, int]]]:
     """Iterate through all chapters and subchapters with numbering."""
@@ -16,7 +19,7 @@ def traverse_chapters(chapters: List[Chapter]) -> Iterator[tuple[str, Tuple[int,
 def chapters_to_json(chapters: List[Chapter], file: Path, output_dir: Path, indent: int = 4) -> None:
     """Save chapter structure into formatted JSON."""
     filename = file.stem
-    print(f"\nExporting file as json ... {output_dir}/{filename}.json")
+    logger.info(f"Exporting file as json ... {output_dir}/{filename}.json")
     with open(output_dir / (filename + ".json"), "w", encoding="utf-8") as f:
         json.dump([asdict(ch) for ch in chapters], f, indent=indent)
 
@@ -0,0 +1,99 @@
+import copy
+import logging
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from docling_core.types.doc import (
+    DocItem,
+    DocItemLabel,
+    DoclingDocument,
+    TableItem,
+    TextItem,
+)
+
+import config.constants as config
+from models.chapter import Chapter
+
+from .mapper import compile_chapter_patterns, get_chapter, match_chapter_heading
+
+logger = logging.getLogger(__name__)
+
+HEADER_LABELS = {DocItemLabel.SECTION_HEADER, DocItemLabel.TITLE}
+# The table of contents is labelled by docling, it is never part of a chapter
+SKIPPED_LABELS = {
+    DocItemLabel.DOCUMENT_INDEX,
+    DocItemLabel.PAGE_HEADER,
+    DocItemLabel.PAGE_FOOTER,
+}
+
+
+def load_document(file: Path) -> DoclingDocument:
+    """Load a DoclingDocument stored in docling's JSON format."""
+    return DoclingDocument.load_from_json(file)
+
+
+def item_text(item: DocItem, doc: DoclingDocument) -> str:
+    """Text of a document item, tables are rendered as markdown for parse_tables."""
+    if isinstance(item, TableItem):
+        return item.export_to_markdown(doc=doc)
+    if isinstance(item, TextItem):
+        return item.text
+    return ""
+
+
+def document_header_text(
+    doc: DoclingDocument, max_chars: int = config.FIPS_HEADER_CHARS
+) -> str:
+    """Text of the first items of the document, up to about `max_chars` characters."""
+    texts, length = [], 0
+    for item, _ in doc.iterate_items():
+        if length >= max_chars:
+            break
+        if isinstance(item, TextItem):
+            texts.append(item.text)
+            length += len(item.text) + 1
+    return "\n".join(texts)
+
+
+def iterate_document_sections(
+    doc: DoclingDocument, chapters: List[Chapter]
+) -> Iterator[Tuple[int, int, DocItem]]:
+    """
+    Walk the items of the document and yield (chapter, subchapter, item) for every
+    item inside a chapter. Only section headers are matched against the chapter
+    headings, each header once. Matched headers themselves are not yielded.
+    """
+    patterns = compile_chapter_patterns(chapters)
+    curr_chapter, curr_subchapter = 0, 0
+
+    for item, _ in doc.iterate_items():
+        if not isinstance(item, DocItem) or item.label in SKIPPED_LABELS:
+            continue
+
+        if item.label in HEADER_LABELS:
+            heading = match_chapter_heading(patterns, item.text.strip(), curr_chapter)
+            if heading:
+                curr_chapter, curr_subchapter = heading
+                get_chapter(chapters, curr_chapter, curr_subchapter).found = True
+                continue
+
+        if curr_chapter > 0:
+            yield curr_chapter, curr_subchapter, item
+
+
+def extract_chapters_from_document(
+    doc: DoclingDocument, base_chapters: List[Chapter]
+) -> List[Chapter]:
+    """
+    Structured counterpart of extract_chapters_from_text. Chapter boundaries are
+    taken from docling's section headers instead of being rediscovered line by line,
+    the resulting chapters have the same format as the text based ones.
+    """
+    chapters = copy.deepcopy(base_chapters)
+
+    for ch_num, sub_num, item in iterate_document_sections(doc, chapters):
+        text = item_text(item, doc).strip()
+        if text:
+            get_chapter(chapters, ch_num, sub_num).content += "\n" + text
+
+    return chapters
@@ -0,0 +1,32 @@
+import re
+
+import config.constants as config
+
+FIPS_140_2 = "140-2"
+FIPS_140_3 = "140-3"
+UNKNOWN = "unknown"
+
+# e.g. "FIPS 140-3", "FIPS PUB 140-2", "FIPS 140–3" (different dashes)
+FIPS_VERSION = re.compile(r"FIPS\s*(?:PUB\s*)?140\s*[-‐‑–—]\s*([23])", re.I)
+# Standards referenced only by FIPS 140-3 security policies
+FIPS_140_3_ONLY = re.compile(
+    r"ISO\s*/\s*IEC\s*(?:19790|24759)|SP\s*800\s*-\s*140", re.I
+)
+
+
+def detect_fips_version(
+    text: str, header_chars: int = config.FIPS_HEADER_CHARS
+) -> str:
+    """
+    Detect whether the security policy is for FIPS 140-2 or FIPS 140-3. Only the
+    beginning of the document (title page, introduction) is scanned, the version
+    mentioned there most often wins. Returns "140-2", "140-3" or "unknown".
+    """
+    header = text[:header_chars]
+    votes = {FIPS_140_2: 0, FIPS_140_3: len(FIPS_140_3_ONLY.findall(header))}
+    for version in FIPS_VERSION.findall(header):
+        votes[FIPS_140_2 if version == "2" else FIPS_140_3] += 1
+
+    if votes[FIPS_140_2] == votes[FIPS_140_3] == 0:
+        return UNKNOWN
+    return FIPS_140_3 if votes[FIPS_140_3] >= votes[FIPS_140_2] else FIPS_140_2
@@ -1,7 +1,7 @@
 import copy
 import logging
 import re
-from typing import List
+from typing import List, Tuple
 
 import regex
 
@@ -12,6 +12,13 @@ from .chapter_utils import traverse_chapters
 
 logger = logging.getLogger(__name__)
 
+# Numbered line, e.g. "4.3 Approved Services", "## 2 General" or "Section 1.1 Overview"
+NUMBERED_LINE = re.compile(r"^[|\s]*(##\s*|Section\s*)?\d+(\.\d+)*\.?\s*[^\W\d_]", re.I)
+# Dot leaders such as "....." or ". . . ." or "…"
+DOT_LEADER = re.compile(r"(\.\s?){4,}|…")
+# Page number at the end of the line, optionally inside a table cell
+PAGE_NUMBER = re.compile(r"\s\|?\s*\d{1,3}\s*\|?$")
+
 
 def substitute(title: str) -> str:
     """Remove spaces and dashes."""
@@ -32,59 +39,130 @@ def build_chapter_regex(
     return rf"^(##|Section)*{chapter_num}(\.?{subchapter_num})?\.?{title}$"
 
 
+def compile_chapter_patterns(
+    chapters: List[Chapter], max_dev: int = config.MAX_DEVIATION
+) -> List[Tuple[Tuple[int, int], regex.Pattern]]:
+    """Compile the fuzzy heading regex of every chapter and subchapter once."""
+    patterns = []
+    for _, (ch_num, sub_num) in traverse_chapters(chapters):
+        ## Match regex with a number of allowed errors
+        pattern = regex.compile(
+            f"({build_chapter_regex(chapters, ch_num, sub_num)}){{e<={max_dev}}}",
+            flags=regex.IGNORECASE,
+        )
+        patterns.append(((ch_num, sub_num), pattern))
+    return patterns
+
+
+def match_chapter_heading(
+    patterns: List[Tuple[Tuple[int, int], regex.Pattern]],
+    heading: str,
+    curr_chapter: int = 0,
+) -> Tuple[int, int] | None:
+    """
+    Return (chapter, subchapter) numbers of the first chapter heading matching the
+    text, chapters before the current chapter are not considered.
+    """
+    heading = substitute(heading)
+    for (ch_num, sub_num), pattern in patterns:
+        if ch_num < curr_chapter:  # TODO can this happen
+            continue
+        if pattern.match(heading):
+            return ch_num, sub_num
+    return None
+
+
+def get_chapter(chapters: List[Chapter], chapter_num: int, subchapter_num: int) -> Chapter:
+    """Needs to be reduced because chapters are numbered from 1."""
+    chapter = chapters[chapter_num - 1]
+    return chapter if subchapter_num == 0 else chapter.subchapters[subchapter_num - 1]
+
+
+def is_toc_line(line: str) -> bool:
+    """A line looks like a TOC entry if it ends with a page number after a number
+    heading or a dot leader."""
+    if not PAGE_NUMBER.search(line):
+        return False
+    return bool(DOT_LEADER.search(line) or NUMBERED_LINE.match(line))
+
+
+def detect_toc_spans(lines: List[str]) -> List[Tuple[int, int]]:
+    """
+    Find table of contents regions as dense runs of TOC-like lines. Returns a list of
+    [start, end) line index spans. A run may be interrupted by at most
+    config.TOC_MAX_GAP other non-empty lines (e.g. wrapped titles, page headers) and
+    needs at least config.TOC_MIN_LINES TOC-like lines to be reported.
+    """
+    spans = []
+    start, last, count, gap = -1, -1, 0, 0
+
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped == "":
+            continue
+        if is_toc_line(stripped):
+            if count == 0:
+                start = i
+            last, count, gap = i, count + 1, 0
+            continue
+        if count > 0:
+            gap += 1
+            if gap > config.TOC_MAX_GAP:
+                if count >= config.TOC_MIN_LINES:
+                    spans.append((start, last + 1))
+                count, gap = 0, 0
+
+    if count >= config.TOC_MIN_LINES:
+        spans.append((start, last + 1))
+
+    return spans
+
+
 # Core extraction logic
 def extract_chapters_from_text(
-    text: str, base_chapters: List[Chapter]
+    text: str,
+    base_chapters: List[Chapter],
+    toc_spans: List[Tuple[int, int]] | None = None,
+    max_dev: int = config.MAX_DEVIATION,
 ) -> List[Chapter]:
     """
     Extract text between chapter boundaries from the given text. Returns a list
     of chapters and fills the .found attribute and .content attribute to appropriate
     value. The chapter titles are not a part of the chapter contents. The matching is case
     insensitive, allows a number of errors in the heading text, which can be configured via
-    config.MAX_DEVIATION.
+    config.MAX_DEVIATION (or `max_dev`). Lines of the table of contents before the first
+    chapter are skipped, the TOC spans are detected by detect_toc_spans unless they are
+    passed in `toc_spans`.
     """
     chapters = copy.deepcopy(base_chapters)
+    patterns = compile_chapter_patterns(chapters, max_dev)
     curr_chapter, curr_subchapter = 0, 0
     inside_chapter = False
 
-    for line in text.splitlines():
+    lines = text.splitlines()
+    if toc_spans is None:
+        toc_spans = detect_toc_spans(lines)
+    toc_lines = {i for start, end in toc_spans for i in range(start, end)}
+
+    for i, line in enumerate(lines):
         stripped = line.strip()
         if stripped == "":
             continue
+        # The TOC precedes the chapters, TOC-like lines inside a chapter (e.g. numbered
+        # lists of self-tests) are regular content
+        if not inside_chapter and i in toc_lines:
+            continue
 
         matched = False
         if stripped.startswith("##") or stripped[0].isnumeric():
-            for _, (ch_num, sub_num) in traverse_chapters(chapters):
-                if ch_num < curr_chapter:  # TODO can this happen
-                    continue
-
-                ## Match regex with a number of allowed errors
-                pattern = regex.compile(
-                    f"({build_chapter_regex(chapters, ch_num, sub_num)}){{e<={config.MAX_DEVIATION}}}",
-                    flags=regex.IGNORECASE,
-                )
-                if pattern.match(substitute(stripped)):
-                    inside_chapter, matched = True, True
-                    curr_chapter, curr_subchapter = ch_num, sub_num
-
-                    # Needs to be reduced because chapters are numbered from 1
-                    chapter = (
-                        chapters[curr_chapter - 1]
-                        if curr_subchapter == 0
-                        else chapters[curr_chapter - 1].subchapters[curr_subchapter - 1]
-                    )
-                    chapter.found = True
-                    break
-
-                if matched:
-                    break
+            heading = match_chapter_heading(patterns, stripped, curr_chapter)
+            if heading:
+                inside_chapter, matched = True, True
+                curr_chapter, curr_subchapter = heading
+                get_chapter(chapters, curr_chapter, curr_subchapter).found = True
 
         if not matched and inside_chapter:
-            chapter = (
-                chapters[curr_chapter - 1]
-                if curr_subchapter == 0
-                else chapters[curr_chapter - 1].subchapters[curr_subchapter - 1]
-            )
+            chapter = get_chapter(chapters, curr_chapter, curr_subchapter)
             chapter.content += "\n" + stripped
 
     return chapters
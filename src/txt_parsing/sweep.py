@@ -0,0 +1,199 @@
+import argparse
+import csv
+import itertools
+import logging
+import os
+import random
+import sqlite3
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import config.constants as config
+from database.db_manager import select_file_metadata
+from models.chapter import Chapter
+
+from .chapter_utils import chapters_from_json
+from .mapper import detect_toc_spans, extract_chapters_from_text
+from .validator import validate_chapters
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SweepResult:
+    max_deviation: int
+    error_accept: int
+    files: int = 0
+    errors: int = 0
+    missing: int = 0
+    accepted: int = 0
+    runtime: float = 0.0  # seconds spent in mapping and validation
+
+
+# Shared by all runs of a worker process, loaded once per worker
+TEXTS: Dict[str, str] = {}
+TOC_SPANS: Dict[str, List[Tuple[int, int]]] = {}
+BASE_CHAPTERS: List[Chapter] = []
+
+
+def init_worker(
+    texts: Dict[str, str],
+    toc_spans: Dict[str, List[Tuple[int, int]]],
+    base_chapters: List[Chapter],
+):
+    global TEXTS, TOC_SPANS, BASE_CHAPTERS
+    TEXTS, TOC_SPANS, BASE_CHAPTERS = texts, toc_spans, base_chapters
+    logging.getLogger("txt_parsing").setLevel(logging.CRITICAL)
+
+
+def map_files(task: Tuple[int, List[str]]) -> Tuple[int, List[Tuple[int, int]], float]:
+    """Map the files with the given MAX_DEVIATION, returns (error, missing) per file."""
+    max_dev, stems = task
+    start = time.perf_counter()
+    counts = []
+    for stem in stems:
+        chapters = extract_chapters_from_text(
+            TEXTS[stem], BASE_CHAPTERS, TOC_SPANS[stem], max_dev
+        )
+        counts.append(validate_chapters(chapters))
+    return max_dev, counts, time.perf_counter() - start
+
+
+def stratified_sample(
+    stems: List[str], db_name: str, size: int, seed: int = 0
+) -> List[str]:
+    """
+    Sample files proportionally from every (year_from, status) stratum, each stratum
+    is represented at least once. Files missing in the database form their own stratum.
+    """
+    conn = sqlite3.connect(db_name)
+    try:
+        metadata = {
+            filename: (year_from, status)
+            for filename, _, year_from, status in select_file_metadata(conn.cursor())
+        }
+    finally:
+        conn.close()
+
+    strata = defaultdict(list)
+    for stem in sorted(stems):
+        strata[metadata.get(stem, (None, None))].append(stem)
+
+    rng = random.Random(seed)
+    sample = []
+    for members in strata.values():
+        count = max(1, round(size * len(members) / len(stems)))
+        sample.extend(rng.sample(members, min(count, len(members))))
+    return sample
+
+
+def run_sweep(
+    input_dir: Path,
+    base_chapters_path: Path,
+    max_deviations: List[int],
+    error_accepts: List[int],
+    sample_size: int | None = None,
+    db_name: str = config.DB_NAME,
+    workers: int | None = None,
+) -> List[SweepResult]:
+    """
+    Map the (sampled) corpus once per MAX_DEVIATION value in parallel. ERROR_ACCEPT
+    only decides which mapped files are accepted, so its values are evaluated on the
+    same mapping results.
+    """
+    files = {file.stem: file for file in input_dir.rglob("*.txt")}
+    stems = list(files)
+    if sample_size and sample_size < len(stems):
+        stems = stratified_sample(stems, db_name, sample_size)
+    logger.info(f"Sweeping {len(stems)} files")
+
+    texts = {}
+    for stem in stems:
+        with open(files[stem]) as f:
+            texts[stem] = f.read()
+
+    # TOC detection does not depend on the swept parameters, it is done only once
+    toc_spans = {
+        stem: detect_toc_spans(text.splitlines()) for stem, text in texts.items()
+    }
+
+    workers = workers or os.cpu_count() or 1
+    chunk = max(1, len(stems) // (workers * 4))
+    tasks = [
+        (max_dev, stems[i : i + chunk])
+        for max_dev in max_deviations
+        for i in range(0, len(stems), chunk)
+    ]
+
+    counts = defaultdict(list)
+    runtime = defaultdict(float)
+    base_chapters = chapters_from_json(base_chapters_path)
+    initargs = (texts, toc_spans, base_chapters)
+    with Pool(workers, initializer=init_worker, initargs=initargs) as pool:
+        for max_dev, task_counts, seconds in pool.imap_unordered(map_files, tasks):
+            counts[max_dev].extend(task_counts)
+            runtime[max_dev] += seconds
+
+    results = []
+    for max_dev, error_accept in itertools.product(max_deviations, error_accepts):
+        results.append(
+            SweepResult(
+                max_deviation=max_dev,
+                error_accept=error_accept,
+                files=len(counts[max_dev]),
+                errors=sum(error for error, _ in counts[max_dev]),
+                missing=sum(missing for _, missing in counts[max_dev]),
+                accepted=sum(error < error_accept for error, _ in counts[max_dev]),
+                runtime=round(runtime[max_dev], 3),
+            )
+        )
+    return results
+
+
+def export_results(results: List[SweepResult], output_file: Path):
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=asdict(results[0]).keys())
+        writer.writeheader()
+        writer.writerows(asdict(result) for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sweep MAX_DEVIATION and ERROR_ACCEPT over the corpus"
+    )
+    parser.add_argument("--max-deviation", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--error-accept", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--sample", type=int, help="stratified sample size")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", type=Path, default=Path(config.SWEEP_RESULTS))
+    args = parser.parse_args()
+
+    results = run_sweep(
+        Path(config.TXT_DIR),
+        Path(config.BASE_CHAPTERS),
+        args.max_deviation,
+        args.error_accept,
+        args.sample,
+        workers=args.workers,
+    )
+    export_results(results, args.output)
+
+    print(
+        f"{'max_dev':>8}{'accept':>8}{'files':>8}{'errors':>8}{'missing':>9}"
+        f"{'accepted':>10}{'runtime':>9}"
+    )
+    for r in results:
+        print(
+            f"{r.max_deviation:>8}{r.error_accept:>8}{r.files:>8}{r.errors:>8}"
+            f"{r.missing:>9}{r.accepted:>10}{r.runtime:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -6,9 +6,14 @@ from models.chapter import Chapter
 logger = logging.getLogger(__name__)
 
 
-def validate_chapters(chapters: List[Chapter]) -> Tuple[int, int]:
+def validate_chapters(
+    chapters: List[Chapter], toc_spans: List[Tuple[int, int]] | None = None
+) -> Tuple[int, int]:
     count, error = 0, 0
 
+    for start, end in toc_spans or []:
+        logger.info(f"Table of contents skipped at lines {start + 1}-{end}")
+
     for i, chapter in enumerate(chapters, 1):
         if not chapter.found:
             logger.warning(f"Chapter not found {i}!!!")
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The modules import each other relative to src, as when run from there
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
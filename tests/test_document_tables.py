@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("docling_core")
+
+from docling_core.types.doc import (  # noqa: E402
+    BoundingBox,
+    DocItemLabel,
+    DoclingDocument,
+    ProvenanceItem,
+    TableCell,
+    TableData,
+)
+
+import config.constants as config  # noqa: E402
+from advanced_parsing.document_tables import (  # noqa: E402
+    collect_section_tables,
+    parse_document_tables,
+)
+from txt_parsing.chapter_utils import chapters_from_json  # noqa: E402
+
+BASE_CHAPTERS = Path(__file__).resolve().parents[1] / config.BASE_CHAPTERS
+
+
+def table_data(rows, header):
+    cells = [
+        TableCell(
+            text=text,
+            start_row_offset_idx=r,
+            end_row_offset_idx=r + 1,
+            start_col_offset_idx=c,
+            end_col_offset_idx=c + 1,
+            column_header=header and r == 0,
+        )
+        for r, row in enumerate(rows)
+        for c, text in enumerate(row)
+    ]
+    return TableData(table_cells=cells, num_rows=len(rows), num_cols=len(rows[0]))
+
+
+def prov(page):
+    return ProvenanceItem(
+        page_no=page, bbox=BoundingBox(l=0, t=0, r=1, b=1), charspan=(0, 0)
+    )
+
+
+def test_captioned_table_split_over_pages_is_merged():
+    doc = DoclingDocument(name="sp")
+    doc.add_heading("2 Cryptographic Module Specification")
+    doc.add_heading("2.5 Algorithms")
+    doc.add_text(DocItemLabel.TEXT, "The module implements the following algorithms.")
+    caption = doc.add_text(DocItemLabel.CAPTION, "Table 4: Approved Algorithms")
+    header = ["Algorithm", "CAVP Cert", "Properties", "Reference"]
+    doc.add_table(
+        table_data([header, ["AES-GCM", "A1", "256", "SP 800-38D"]], True),
+        caption=caption,
+        prov=prov(1),
+    )
+    doc.add_table(
+        table_data([["SHA2-256", "A2", "", "FIPS 180-4"]], False), prov=prov(2)
+    )
+    base_chapters = chapters_from_json(BASE_CHAPTERS)
+
+    tables = collect_section_tables(doc, base_chapters)[(2, 5)]
+    assert [(t.title, len(t.rows)) for t in tables] == [
+        ("Table 4: Approved Algorithms", 2)
+    ]
+
+    adv = parse_document_tables(doc, base_chapters)
+    entries = [
+        table.entries
+        for table in vars(adv).values()
+        if table.name == "Approved Algorithms"
+    ][0]
+    assert [entry.algorithm for entry in entries] == ["AES-GCM", "SHA2-256"]